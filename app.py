@@ -1,18 +1,41 @@
 import os
+import re
+import io
 import sys
 import json
+import base64
+import hashlib
+import hmac
+import mimetypes
+import posixpath
 import logging
-from datetime import datetime
-from flask import Flask, render_template_string, request, jsonify, session
+import time
+import threading
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from flask import Flask, render_template_string, request, jsonify, session, Response, stream_with_context
+
+from pipeline import BatchStage, Pipeline, Stage, parse_stage_config
+from push_ingest import PushCoalescer, PushPayloadError, parse_push_envelope
+from archive_expand import ARCHIVE_MAX_BYTES, LIMITS, ExpansionBudget, archive_kind, expand_archive, is_archive_part
+from attachment_sniff import SKIP_REASONS, inspect_attachment, is_document_part, size_skip_reason
+from candidate_table import CandidateTable
+from export_stream import iter_csv, iter_ndjson, iter_xlsx
+from html_text import html_to_text
+from index_snapshot import IndexSnapshot, SnapshotFormatError, write_snapshot
+from log_pipeline import LogPipeline, LogSampler
+from scan_store import ScanCheckpoint, ScanStore
+from skill_index import FilterQueryError, SkillIndex
+from snapshot_export import PYARROW_AVAILABLE, SnapshotExporter
+from scan_scheduler import MANUAL, PUSH, ScanScheduler
+from sheet_sync import SheetSync
 
 # RAILWAY FIX 1: Ensure proper logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-    stream=sys.stdout
-)
+# Records are queued and written to stdout by a background thread, so logging never blocks a scan
+log_pipeline = LogPipeline(sys.stdout)
+log_pipeline.install(level=logging.INFO)
 
-# RAILWAY FIX 2: Set proper timeouts and buffering
+# RAILWAY FIX 2: Set proper timeouts and buffering (only the log writer thread pays for the flushes)
 sys.stdout.reconfigure(line_buffering=True)
 
 # Try to import Google API libraries
@@ -21,6 +44,7 @@ try:
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
+    from googleapiclient.http import MediaIoBaseUpload
     GOOGLE_APIS_AVAILABLE = True
 except ImportError:
     GOOGLE_APIS_AVAILABLE = False
@@ -55,12 +79,170 @@ SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets'
 ]
 
+# Words that mark an email as a job application
+RESUME_KEYWORDS = ('resume', 'cv', 'curriculum vitae', 'application', 'candidate')
+_KEYWORD_QUERY = '(' + ' OR '.join(f'"{k}"' if ' ' in k else k for k in RESUME_KEYWORDS) + ')'
+RESUME_KEYWORD_PATTERN = re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in RESUME_KEYWORDS) + r')\b', re.IGNORECASE)
+
+# Gmail search used to find candidate emails: applications with an attachment, or a subject naming
+# one (resumes pasted into the body)
+SCAN_QUERY = os.environ.get('SCAN_QUERY', f'{_KEYWORD_QUERY} (has:attachment OR subject:{_KEYWORD_QUERY})')
+SCAN_PAGE_SIZE = int(os.environ.get('SCAN_PAGE_SIZE', 100))
+# Message bodies shorter than this are cover notes, not pasted resumes
+BODY_MIN_CHARS = int(os.environ.get('BODY_MIN_CHARS', 400))
+# A pasted resume must name at least this many skills and carry an email address or phone number
+BODY_MIN_SKILLS = int(os.environ.get('BODY_MIN_SKILLS', 3))
+BODY_MIME_TYPES = ('text/plain', 'text/html')
+SHEET_ID = os.environ.get('SHEET_ID')
+DRIVE_FOLDER_ID = os.environ.get('DRIVE_FOLDER_ID')
+
+# Gmail push notifications (users.watch -> Pub/Sub -> /api/gmail/push)
+GMAIL_PUBSUB_TOPIC = os.environ.get('GMAIL_PUBSUB_TOPIC')
+PUBSUB_VERIFICATION_TOKEN = os.environ.get('PUBSUB_VERIFICATION_TOKEN')
+PUSH_COALESCE_SECONDS = float(os.environ.get('PUSH_COALESCE_SECONDS', 2.0))
+
+# Scan pipeline sizing, e.g. SCAN_WORKERS="download=4,extract=2"
+SCAN_WORKERS = dict(
+    {'triage': 4, 'download': 4, 'extract': 2, 'match': 1, 'persist': 2},
+    **parse_stage_config(os.environ.get('SCAN_WORKERS'))
+)
+SCAN_QUEUE_SIZE = int(os.environ.get('SCAN_QUEUE_SIZE', 32))
+# Scheduled scans run with fewer workers so they leave CPU for dashboard requests
+SCHEDULED_SCAN_WORKERS = dict(
+    {'triage': 2, 'download': 2, 'extract': 1, 'match': 1, 'persist': 1},
+    **parse_stage_config(os.environ.get('SCHEDULED_SCAN_WORKERS'))
+)
+
+# Periodic incremental scans per Gmail label id in seconds, e.g. SCAN_SCHEDULE="INBOX=1800,Label_12=3600"
+SCAN_SCHEDULE = parse_stage_config(os.environ.get('SCAN_SCHEDULE', 'INBOX=1800'), cast=float)
+SCAN_SCHEDULE_JITTER = float(os.environ.get('SCAN_SCHEDULE_JITTER', 0.1))
+SCAN_MAX_CONCURRENT = int(os.environ.get('SCAN_MAX_CONCURRENT', 1))
+SCAN_ACCOUNT_CONCURRENCY = int(os.environ.get('SCAN_ACCOUNT_CONCURRENCY', 1))
+SCAN_EXPORT_BATCH = int(os.environ.get('SCAN_EXPORT_BATCH', 200))
+
+# Durable scan state (runs, checkpoints, candidates) so restarts can resume
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+SCAN_DB_PATH = os.environ.get('SCAN_DB_PATH', os.path.join(DATA_DIR, 'scanner.db'))
+CHECKPOINT_INTERVAL_SECONDS = float(os.environ.get('CHECKPOINT_INTERVAL_SECONDS', 2.0))
+# Memory-mapped snapshot of the skill bitmaps and candidate columns, reloaded on startup
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH', os.path.join(DATA_DIR, 'search.idx'))
+
+# Columnar snapshots of completed runs for offline analytics: opt in with SNAPSHOT_EXPORT=1 (needs pyarrow)
+SNAPSHOT_EXPORT = os.environ.get('SNAPSHOT_EXPORT', '').lower() in ('1', 'true', 'yes')
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(DATA_DIR, 'snapshots'))
+SNAPSHOT_FORMAT = os.environ.get('SNAPSHOT_FORMAT', 'arrow')
+# Small push and scheduled runs are rolled up: export once this many are pending or the oldest is this old
+SNAPSHOT_BATCH_RUNS = int(os.environ.get('SNAPSHOT_BATCH_RUNS', 20))
+SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get('SNAPSHOT_MAX_AGE_SECONDS', 6 * 3600))
+
+# Columns of the results sheet and of CSV/XLSX downloads
+CANDIDATE_HEADER = ['Name', 'Email', 'Phone', 'Experience (years)', 'Skills', 'Skill Count',
+                    'Sender', 'Received', 'Filename', 'Drive File ID']
+# The same public fields for JSON exports; internal columns (exported, content_hash, ...) stay out
+CANDIDATE_FIELDS = ('id', 'name', 'email', 'phone', 'experience_years', 'skills', 'skill_count',
+                    'sender', 'received', 'filename', 'drive_file_id')
+CANDIDATE_PAGE_LIMIT = 500
+
+# VLSI skill keywords grouped by domain
+VLSI_SKILLS = {
+    'Verification': ['UVM', 'SystemVerilog', 'OVM', 'SVA', 'Formal Verification',
+                     'Functional Coverage', 'Testbench', 'Assertions'],
+    'Design': ['Verilog', 'VHDL', 'RTL Design', 'Microarchitecture', 'CDC', 'Lint', 'FPGA'],
+    'Physical Design': ['Floorplanning', 'Placement', 'CTS', 'Routing', 'STA', 'Timing Closure',
+                        'IR Drop', 'PrimeTime', 'Innovus', 'ICC2'],
+    'DFT': ['DFT', 'Scan Insertion', 'ATPG', 'MBIST', 'JTAG', 'BIST'],
+    'Analog': ['Analog Layout', 'Virtuoso', 'Spectre', 'SPICE', 'LVS', 'DRC', 'Calibre'],
+    'Tools': ['Cadence', 'Synopsys', 'Mentor', 'Xilinx', 'Vivado', 'Design Compiler', 'VCS', 'Questa'],
+    'Protocols': ['AXI', 'AHB', 'APB', 'PCIe', 'USB', 'DDR', 'Ethernet', 'I2C', 'SPI', 'UART'],
+    'Scripting': ['Perl', 'Python', 'TCL', 'Shell Scripting']
+}
+
+# One pre-compiled pattern per skill, built once at import
+SKILL_PATTERNS = [
+    (skill, category, re.compile(r'(?<![\w])' + re.escape(skill) + r'(?![\w])', re.IGNORECASE))
+    for category, skills in VLSI_SKILLS.items()
+    for skill in skills
+]
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+PHONE_PATTERN = re.compile(r'(?:\+?\d{1,3}[\s-]?)?\(?\d{3,5}\)?[\s-]?\d{3,5}(?:[\s-]?\d{2,4})?')
+EXPERIENCE_PATTERN = re.compile(r'(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years|yrs)', re.IGNORECASE)
+FRESHER_PATTERN = re.compile(r'\bfresher\b|\bfresh graduate\b', re.IGNORECASE)
+CHARSET_PATTERN = re.compile(r'charset="?([\w.:-]+)', re.IGNORECASE)
+
+
+def extract_text(filename: str, data: bytes, kind: str = None) -> str:
+    """Extract plain text from a PDF or DOCX attachment
+
+    `kind` is the sniffed format; without it the file extension decides.
+    """
+    name = filename.lower()
+    kind = kind or ('pdf' if name.endswith('.pdf') else 'docx' if name.endswith('.docx') else None)
+    if kind == 'pdf' and PDF_PROCESSING_AVAILABLE:
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    if kind == 'docx' and DOCX_PROCESSING_AVAILABLE:
+        document = Document(io.BytesIO(data))
+        return '\n'.join(p.text for p in document.paragraphs)
+    return ''
+
+
+def body_text(data: bytes, kind: str, charset: str = None) -> str:
+    """Plain text of a text/plain or text/html message body"""
+    try:
+        text = data.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        text = data.decode('utf-8', errors='replace')
+    return html_to_text(text) if kind == 'html' else text
+
+
+def match_skills(text: str) -> dict:
+    """Return matched VLSI skills grouped by category"""
+    matched = {}
+    for skill, category, pattern in SKILL_PATTERNS:
+        if pattern.search(text):
+            matched.setdefault(category, []).append(skill)
+    return matched
+
+
+def extract_fields(text: str) -> dict:
+    """Pull contact details and experience out of resume text"""
+    email = EMAIL_PATTERN.search(text)
+    phone = PHONE_PATTERN.search(text)
+    years = [float(y) for y in EXPERIENCE_PATTERN.findall(text)]
+    name = ''
+    for line in text.splitlines():
+        line = line.strip()
+        if line and '@' not in line and 1 < len(line.split()) <= 4:
+            name = line
+            break
+    return {
+        'name': name,
+        'email': email.group(0) if email else '',
+        'phone': phone.group(0).strip() if phone else '',
+        'experience_years': max(years) if years else 0.0,
+        'fresher': bool(FRESHER_PATTERN.search(text))
+    }
+
+def received_date(candidate: dict) -> date:
+    """Best-effort calendar date the candidate's email arrived"""
+    try:
+        return parsedate_to_datetime(candidate.get('received') or '').date()
+    except (TypeError, ValueError, IndexError):
+        created = candidate.get('created_at')
+        return datetime.fromisoformat(created).date() if created else date.today()
+
+def http_status(error: Exception):
+    """HTTP status of a Google API error (googleapiclient's HttpError or the bench fakes), else None"""
+    return getattr(getattr(error, 'resp', None), 'status', None) or getattr(error, 'status', None)
+
 # RAILWAY FIX 4: Add health check and startup optimization (Flask 2.3+ compatible)
 def initialize_app():
     """Initialize app - this runs on startup"""
     app.logger.info("🚀 VLSI Resume Scanner starting up...")
     app.logger.info(f"📊 Google APIs available: {GOOGLE_APIS_AVAILABLE}")
     app.logger.info(f"🔧 Environment: Railway Cloud")
+    if not PUBSUB_VERIFICATION_TOKEN:
+        app.logger.warning("⚠️ PUBSUB_VERIFICATION_TOKEN not set: /api/gmail/push refuses every notification")
 
 # Call initialization immediately
 with app.app_context():
@@ -90,27 +272,79 @@ def startup_check():
 class VLSIResumeScanner:
     """VLSI Resume Scanner with Google Integration - Railway Optimized"""
     
-    def __init__(self):
+    def __init__(self, store: ScanStore = None):
         self.credentials = None
         self.gmail_service = None
         self.drive_service = None
         self.sheets_service = None
         self.logs = []
         self.max_logs = 50
+        self.log_sampler = LogSampler()
         self.stats = {
             'total_emails': 0,
             'resumes_found': 0,
             'last_scan_time': None,
-            'processing_errors': 0
+            'processing_errors': 0,
+            'duplicates_skipped': 0,
+            'push_scans': 0,
+            'sheet_rows_inserted': 0,
+            'sheet_rows_updated': 0,
+            'sheet_rows_unchanged': 0,
+            **{f'skipped_{reason}': 0 for reason in SKIP_REASONS},
+            'bodies_scanned': 0,
+            'body_candidates': 0,
+            'archives_expanded': 0,
+            'archive_entries': 0,
+            **{f'archive_limit_{limit}': 0 for limit in LIMITS}
         }
         self.current_user_email = None
         self._oauth_flow = None
+        self.candidates = None
+        self.spreadsheet_id = None
+        self._seen_hashes = set()
+        self._scan_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.pipeline = None
+        self.last_scan_latencies = []
+        self.store = store or ScanStore(SCAN_DB_PATH)
+        # Cursors survive restarts, so the first push after one scans its mail instead of only setting a baseline
+        self._load_history_cursors()
+        orphaned = self.store.fail_orphaned_runs()
+        if orphaned:
+            self.add_log(f"⚠️ Marked {orphaned} unfinished history scan runs as failed", 'warning')
+        self.sheet_sync = SheetSync(self.store)
+        # A spreadsheet created on an earlier sync is reused, so recycled workers keep appending to it
+        self.spreadsheet_id = SHEET_ID or self.store.spreadsheet_id()
+        if self.spreadsheet_id:
+            self.store.save_spreadsheet_id(self.spreadsheet_id)
+        self._checkpoint = None
+        self.snapshots = None
+        if SNAPSHOT_EXPORT and PYARROW_AVAILABLE:
+            self.snapshots = SnapshotExporter(self.store, SNAPSHOT_DIR, SNAPSHOT_FORMAT,
+                                              SNAPSHOT_BATCH_RUNS, SNAPSHOT_MAX_AGE_SECONDS)
+        elif SNAPSHOT_EXPORT:
+            self.add_log("⚠️ SNAPSHOT_EXPORT is set but pyarrow is not installed; snapshots are disabled", 'warning')
+        self.skill_index = None
+        self._index_lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_max_id = 0
+        self._load_candidates()
         
         # RAILWAY FIX 6: Add startup logging
         self.add_log("🚀 VLSI Resume Scanner initialized for Railway", 'info')
         
-    def add_log(self, message: str, level: str = 'info'):
-        """Enhanced logging for Railway"""
+    def add_log(self, message: str, level: str = 'info', sample: str = None):
+        """Enhanced logging for Railway
+
+        Per-message logs pass a `sample` key; beyond a burst per interval they
+        are counted instead of logged.
+        """
+        extra = {}
+        if sample:
+            suppressed = self.log_sampler.allow(sample)
+            if suppressed is None:
+                return
+            extra = {'sample': sample, 'suppressed': suppressed} if suppressed else {'sample': sample}
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_entry = {
             'timestamp': timestamp,
@@ -125,11 +359,11 @@ class VLSIResumeScanner:
         
         # RAILWAY FIX 7: Ensure logs appear in Railway dashboard
         if level == 'error':
-            app.logger.error(f"[{timestamp}] {message}")
+            app.logger.error(message, extra=extra)
         elif level == 'warning':
-            app.logger.warning(f"[{timestamp}] {message}")
+            app.logger.warning(message, extra=extra)
         else:
-            app.logger.info(f"[{timestamp}] {message}")
+            app.logger.info(message, extra=extra)
 
     def get_system_status(self) -> dict:
         """Get current system status"""
@@ -137,12 +371,16 @@ class VLSIResumeScanner:
             'google_apis_available': GOOGLE_APIS_AVAILABLE,
             'pdf_processing_available': PDF_PROCESSING_AVAILABLE,
             'docx_processing_available': DOCX_PROCESSING_AVAILABLE,
+            'snapshot_export_available': PYARROW_AVAILABLE,
+            'snapshot_export_enabled': self.snapshots is not None,
             'gmail_service_active': self.gmail_service is not None,
             'drive_service_active': self.drive_service is not None,
             'sheets_service_active': self.sheets_service is not None,
             'current_user': self.current_user_email,
             'stats': self.stats,
+            'pipeline': self.pipeline.metrics() if self.pipeline else {},
             'recent_logs': self.logs[-5:] if self.logs else [],
+            'logging': dict(log_pipeline.stats(), suppressed=self.log_sampler.suppressed),
             'environment_check': {
                 'has_client_id': bool(os.environ.get('GOOGLE_CLIENT_ID')) or bool(session.get('google_client_id')),
                 'has_client_secret': bool(os.environ.get('GOOGLE_CLIENT_SECRET')) or bool(session.get('google_client_secret')),
@@ -362,6 +600,10 @@ class VLSIResumeScanner:
                 self.add_log(f"❌ Sheets service failed: {sheets_error}", 'error')
             
             self.current_user_email = email
+
+            # Switch to push-based ingestion when a Pub/Sub topic is configured
+            if GMAIL_PUBSUB_TOPIC and self.gmail_service:
+                self.start_watch(GMAIL_PUBSUB_TOPIC)
             
             # Clean up session
             session.pop('oauth_client_id', None)
@@ -383,9 +625,685 @@ class VLSIResumeScanner:
             self.add_log(f"❌ OAuth completion failed: {error_msg}", 'error')
             return {'success': False, 'error': f'Authentication failed: {error_msg}'}
 
+    def scan_emails(self, query: str = SCAN_QUERY, max_messages: int = None, workers: dict = None) -> dict:
+        """Scan Gmail for resume attachments and export matches"""
+        if not self.gmail_service:
+            return {'success': False, 'error': 'Gmail authentication required'}
+
+        # Like history scans, a full scan waits for the one in progress; the scheduler caps how many queue up
+        with self._scan_lock:
+            self.add_log(f"📧 Starting email scan: {query}", 'info')
+
+            # Pick up a run that a killed or recycled worker left unfinished
+            interrupted = self.store.find_interrupted_run('full', query)
+            if interrupted:
+                run_id = interrupted['run_id']
+                self.store.claim_run(run_id)
+                processed = self.store.processed_ids(run_id)
+                start_token = interrupted['page_token']
+                listing_done = bool(interrupted['listing_done'])
+                self.add_log(f"♻️ Resuming scan run {run_id} after {len(processed)} processed emails", 'info')
+            else:
+                # Remember where the mailbox history stands, so that once this scan
+                # completes, push notifications only process what arrived after it
+                profile = self.gmail_service.users().getProfile(userId='me').execute()
+                baseline = int(profile.get('historyId', 0)) or self.last_history_id
+                run_id = self.store.start_run('full', query, history_baseline=baseline)
+                processed = set()
+                start_token = None
+                listing_done = False
+
+            checkpoint = self._new_checkpoint(run_id, processed, interrupted)
+
+            def list_messages():
+                if listing_done:
+                    return
+                listed = len(processed)
+                page_token = start_token
+                page_no = 0
+                while True:
+                    response = self.gmail_service.users().messages().list(
+                        userId='me', q=query, pageToken=page_token, maxResults=SCAN_PAGE_SIZE
+                    ).execute()
+                    checkpoint.page_listed(page_no, page_token)
+                    for ref in response.get('messages', []):
+                        if ref['id'] in processed:
+                            continue
+                        if max_messages is not None and listed >= max_messages:
+                            checkpoint.page_complete(page_no, None)
+                            return
+                        listed += 1
+                        checkpoint.message_listed(ref['id'], page_no)
+                        yield ref['id']
+                    page_token = response.get('nextPageToken')
+                    checkpoint.page_complete(page_no, page_token)
+                    if not page_token:
+                        return
+                    page_no += 1
+
+            result = self._run_pipeline(list_messages, checkpoint, workers)
+            result['resumed'] = interrupted is not None
+            if result['success']:
+                # Completing the run replaced every label's cursor with its baseline
+                self._load_history_cursors()
+            self.add_log(f"✅ Email scan completed: {result['resumes_found']} resumes in "
+                         f"{result['emails_scanned']} emails", 'info')
+            return result
+
+    def start_watch(self, topic_name: str = GMAIL_PUBSUB_TOPIC) -> dict:
+        """Ask Gmail to publish INBOX changes to a Pub/Sub topic"""
+        if not self.gmail_service:
+            return {'success': False, 'error': 'Gmail authentication required'}
+        if not topic_name:
+            return {'success': False, 'error': 'GMAIL_PUBSUB_TOPIC not configured'}
+        if not PUBSUB_VERIFICATION_TOKEN:
+            return {'success': False, 'error': 'PUBSUB_VERIFICATION_TOKEN not configured; pushes would be refused'}
+        try:
+            response = self.gmail_service.users().watch(
+                userId='me', body={'topicName': topic_name, 'labelIds': ['INBOX']}
+            ).execute()
+            self.last_history_id = self.last_history_id or int(response['historyId'])
+            self.add_log(f"🔔 Gmail watch active on {topic_name} until {response.get('expiration')}", 'info')
+            return {'success': True, 'history_id': response['historyId'], 'expiration': response.get('expiration')}
+        except Exception as e:
+            self.add_log(f"❌ Gmail watch failed: {e}", 'error')
+            return {'success': False, 'error': str(e)}
+
+    @property
+    def last_history_id(self):
+        """historyId up to which INBOX has been processed"""
+        return self.history_cursor('INBOX')
+
+    @last_history_id.setter
+    def last_history_id(self, value):
+        self.set_history_cursor('INBOX', value)
+
+    def _load_history_cursors(self):
+        self.history_ids = self.store.history_cursors()
+        self._history_baseline = self.history_ids.pop('', None)
+
+    def history_cursor(self, label_id: str):
+        return self.history_ids.get(label_id, self._history_baseline)
+
+    def set_history_cursor(self, label_id: str, history_id: int):
+        self.history_ids[label_id] = history_id
+        if history_id is not None:
+            self.store.save_history_cursor(label_id, history_id)
+
+    def push_needs_scan(self, email_address: str, history_id: int) -> bool:
+        """Whether a push notification points past the history already processed"""
+        if self.current_user_email and email_address.lower() != self.current_user_email.lower():
+            self.add_log(f"⚠️ Ignoring push for unknown mailbox {email_address}", 'warning')
+            return False
+        if self.last_history_id is None or history_id <= self.last_history_id:
+            # Without a baseline there is nothing to diff against; the next full scan sets one
+            self.last_history_id = max(history_id, self.last_history_id or 0)
+            return False
+        return True
+
+    def incremental_scan(self, label_id: str = 'INBOX', full: bool = False, workers: dict = None) -> dict:
+        """Scan what arrived under `label_id` since its history cursor, or everything if there is none"""
+        if not self.gmail_service:
+            return {'success': False, 'error': 'Gmail authentication required'}
+        # An unfinished full scan comes first: cursors set by pushes meanwhile do not cover its backlog
+        if full or self.history_cursor(label_id) is None or self.store.find_interrupted_run('full', SCAN_QUERY):
+            return self.scan_emails(workers=workers)
+        return self._scan_history(label_id, 'incremental', workers)
+
+    def _scan_history(self, label_id: str, kind: str, workers: dict = None) -> dict:
+        with self._scan_lock:
+            start_history_id = self.history_cursor(label_id)
+            latest = {'history_id': start_history_id, 'expired': False}
+            checkpoint = self._new_checkpoint(self.store.start_run(kind, label_id))
+
+            def list_added_messages():
+                seen = set()
+                page_token = None
+                while True:
+                    try:
+                        response = self.gmail_service.users().history().list(
+                            userId='me', startHistoryId=start_history_id, historyTypes=['messageAdded'],
+                            labelId=label_id, pageToken=page_token
+                        ).execute()
+                    except Exception as e:
+                        # Gmail keeps about a week of history; an older startHistoryId is answered with 404
+                        latest['expired'] = http_status(e) == 404
+                        raise
+                    latest['history_id'] = max(latest['history_id'], int(response.get('historyId', 0)))
+                    for record in response.get('history', []):
+                        for added in record.get('messagesAdded', []):
+                            message_id = added['message']['id']
+                            if message_id not in seen:
+                                seen.add(message_id)
+                                checkpoint.message_listed(message_id, None)
+                                yield message_id
+                    page_token = response.get('nextPageToken')
+                    if not page_token:
+                        return
+
+            # The cursor only moves once every page has been listed; `latest` already
+            # holds the mailbox head after the first page
+            result = self._run_pipeline(list_added_messages, checkpoint, workers, resumable=False,
+                                        history_cursors=lambda: {label_id: latest['history_id']})
+            if result['success']:
+                self.add_log(f"🔔 {kind.capitalize()} scan of {label_id}: {result['resumes_found']} resumes in "
+                             f"{result['emails_scanned']} new emails", 'info')
+            elif not latest['expired']:
+                self.add_log(f"⚠️ {kind.capitalize()} scan of {label_id} could not list its history; "
+                             f"the cursor stays at {start_history_id}", 'warning')
+
+        if latest['expired']:
+            self.add_log(f"⚠️ History of {label_id} since {start_history_id} has expired; "
+                         f"falling back to a full scan", 'warning')
+            return self.scan_emails(workers=workers)
+        return result
+
+    def _bump(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _new_checkpoint(self, run_id: str, processed: set = None, previous_run: dict = None) -> ScanCheckpoint:
+        checkpoint = ScanCheckpoint(self.store, run_id, processed, CHECKPOINT_INTERVAL_SECONDS,
+                                    resumes_found=(previous_run or {}).get('resumes_found', 0))
+        checkpoint.previous_offsets = json.loads((previous_run or {}).get('stage_offsets') or '{}')
+        return checkpoint
+
+    def _run_pipeline(self, list_messages, checkpoint: ScanCheckpoint, workers: dict = None,
+                      resumable: bool = True, history_cursors=None) -> dict:
+        """Run list -> triage -> download -> extract -> match -> persist -> export
+
+        `history_cursors` returns the {label_id: history_id} the listing reached;
+        they are saved only if the run completes.
+        """
+        config = dict(SCAN_WORKERS, **(workers or {}))
+        self.last_scan_latencies = []
+        self._checkpoint = checkpoint
+
+        def list_stage(_seed):
+            for message_id in list_messages():
+                yield {'message_id': message_id, 'listed_at': time.perf_counter()}
+
+        stages = [
+            Stage('list', list_stage, 1, SCAN_QUEUE_SIZE),
+            Stage('triage', self._triage_message, config.get('triage', 1), SCAN_QUEUE_SIZE),
+            Stage('download', self._download_attachment, config.get('download', 1), SCAN_QUEUE_SIZE),
+            Stage('extract', self._extract_attachment, config.get('extract', 1), SCAN_QUEUE_SIZE),
+            Stage('match', self._match_candidate, config.get('match', 1), SCAN_QUEUE_SIZE),
+            Stage('persist', self._persist_candidate, config.get('persist', 1), SCAN_QUEUE_SIZE),
+            BatchStage('export', self._export_batch, SCAN_EXPORT_BATCH, SCAN_QUEUE_SIZE)
+        ]
+        self.pipeline = Pipeline(stages, on_error=self._on_stage_error, name='scan')
+
+        def stage_offsets():
+            # Items each stage has completed across every attempt of this run
+            offsets = dict(checkpoint.previous_offsets)
+            for stage in stages:
+                offsets[stage.name] = checkpoint.previous_offsets.get(stage.name, 0) + stage.processed
+            return offsets
+
+        checkpoint.stage_offsets = stage_offsets
+        try:
+            self.pipeline.run()
+        finally:
+            checkpoint.flush()
+
+        # Candidates persisted by an earlier, interrupted attempt may never have reached Sheets
+        leftovers = self.store.unexported_candidates()
+        if leftovers:
+            self._export_batch(leftovers)
+
+        # A failed listing leaves the run resumable instead of completing it; history
+        # scans are not resumed, they start over from their label's cursor
+        if stages[0].errors:
+            status = 'interrupted' if resumable else 'failed'
+        else:
+            status = 'completed'
+        cursors = history_cursors() if history_cursors and status == 'completed' else {}
+        emails_scanned = len(checkpoint.processed)
+        self.store.finish_run(checkpoint.run_id, status, emails_scanned, checkpoint.resumes_found, cursors)
+        self.history_ids.update(cursors)
+        if status == 'completed':
+            self._save_search_snapshot_async()
+            if self.snapshots:
+                self.snapshots.export_in_background()
+
+        self._bump('total_emails', stages[0].emitted)
+        self._bump('resumes_found', stages[-2].emitted)
+        self.stats['last_scan_time'] = datetime.now().isoformat()
+
+        return {
+            'success': status == 'completed',
+            'run_id': checkpoint.run_id,
+            'emails_scanned': emails_scanned,
+            'resumes_found': checkpoint.resumes_found,
+            'pipeline': self.pipeline.metrics()
+        }
+
+    def _on_stage_error(self, stage: str, item, error: Exception):
+        self._bump('processing_errors')
+        message_id = item.get('message_id') if isinstance(item, dict) else None
+        self.add_log(f"❌ {stage} failed for message {message_id}: {error}", 'error', sample=f"{stage}_failed")
+        if message_id and stage not in ('list', 'export'):
+            # Failed items are not retried on resume
+            self._checkpoint.message_done(message_id)
+
+    def _triage_message(self, item: dict):
+        """Fetch a message and emit one work item per resume attachment
+
+        A message without any document attachment but with a long enough body
+        and a subject or preview naming an application emits the body instead,
+        for candidates who paste their resume inline. Incremental scans list
+        every new message, so newsletters and notifications must not get there.
+        """
+        message = self.gmail_service.users().messages().get(
+            userId='me', id=item['message_id'], format='full'
+        ).execute()
+        headers = {h['name'].lower(): h['value'] for h in message.get('payload', {}).get('headers', [])}
+
+        parts = []
+        archives = []
+        forwarded = []
+        bodies = {}
+        for part in self._iter_parts(message.get('payload', {})):
+            filename = part.get('filename', '')
+            mime_type = (part.get('mimeType') or '').lower()
+            attachment_id = part.get('body', {}).get('attachmentId')
+            part_id = part.get('partId') or ''
+            if mime_type == 'message/rfc822':
+                forwarded.append(part_id)
+            if not filename and mime_type in BODY_MIME_TYPES:
+                # Bodies of forwarded messages belong to someone else's email
+                if not any(part_id.startswith(f"{f}.") for f in forwarded):
+                    bodies.setdefault(mime_type, part)
+                continue
+            if not attachment_id or any(part_id.startswith(f"{a}.") for a in archives):
+                # Gmail also lists the parts of an attached email; the email is expanded as a whole
+                continue
+            # Reject on the declared type and size before spending a download on it
+            size = part.get('body', {}).get('size')
+            if is_archive_part(filename, part.get('mimeType')):
+                archives.append(part_id)
+                skip_reason = size_skip_reason(size, ARCHIVE_MAX_BYTES)
+            elif is_document_part(filename, part.get('mimeType')):
+                skip_reason = size_skip_reason(size)
+            else:
+                skip_reason = 'not_document'
+            if skip_reason:
+                self._bump(f'skipped_{skip_reason}')
+                continue
+            parts.append(dict(item, headers=headers, filename=filename, attachment_id=attachment_id,
+                              mime_type=part.get('mimeType')))
+
+        body = bodies.get('text/plain') or bodies.get('text/html')
+        if (not parts and body and (body.get('body', {}).get('size') or 0) >= BODY_MIN_CHARS
+                and RESUME_KEYWORD_PATTERN.search(f"{headers.get('subject', '')} {message.get('snippet', '')}")):
+            self._bump('bodies_scanned')
+            parts.append(self._body_item(item, headers, body))
+
+        self._checkpoint.message_expanded(item['message_id'], len(parts))
+        return parts
+
+    @staticmethod
+    def _body_item(item: dict, headers: dict, part: dict) -> dict:
+        html = part['mimeType'].lower() == 'text/html'
+        part_headers = {h['name'].lower(): h['value'] for h in part.get('headers', [])}
+        charset = CHARSET_PATTERN.search(part_headers.get('content-type', ''))
+        return dict(item, headers=headers, source='body', kind='html' if html else 'text',
+                    filename='email_body.html' if html else 'email_body.txt', mime_type=part['mimeType'],
+                    charset=charset.group(1) if charset else None,
+                    attachment_id=part['body'].get('attachmentId'), inline_data=part['body'].get('data'))
+
+    def _fetch_part(self, item: dict) -> bytes:
+        if item.get('inline_data'):
+            return base64.urlsafe_b64decode(item['inline_data'])
+        attachment = self.gmail_service.users().messages().attachments().get(
+            userId='me', messageId=item['message_id'], id=item['attachment_id']
+        ).execute()
+        return base64.urlsafe_b64decode(attachment['data'])
+
+    def _download_attachment(self, item: dict):
+        data = self._fetch_part(item)
+        if item.get('source') == 'body':
+            yield from self._admit_body(item, data)
+            return
+        kind = archive_kind(item['filename'], item['mime_type'], data)
+        if kind:
+            yield from self._expand_archive(item, kind, data)
+        else:
+            yield from self._admit_attachment(item, data)
+
+    def _claim_content(self, item: dict, content_hash: str) -> tuple:
+        """(duplicate, replayed, known row) for content about to be processed for item's message"""
+        with self._stats_lock:
+            known = None if content_hash in self._seen_hashes else self.store.find_attachment(content_hash)
+            replayed = bool(known and known['run_id'] == self._checkpoint.run_id
+                            and known['message_id'] == item['message_id'])
+            duplicate = content_hash in self._seen_hashes or (known is not None and not replayed)
+            if duplicate:
+                self.stats['duplicates_skipped'] += 1
+            else:
+                self._seen_hashes.add(content_hash)
+        return duplicate, replayed, known
+
+    def _admit_attachment(self, item: dict, data: bytes):
+        """Deduplicate and sniff one document, emitting it only if it is worth extracting"""
+        content_hash = hashlib.sha1(data).hexdigest()
+        duplicate, replayed, known = self._claim_content(item, content_hash)
+        if duplicate or replayed:
+            # A replayed message finished this attachment before the last checkpoint
+            self._checkpoint.message_done(item['message_id'], resume=replayed and bool(known['is_resume']))
+            return
+
+        item['data'] = data
+        item['size'] = len(data)
+        item['content_hash'] = content_hash
+        item['kind'], skip_reason = inspect_attachment(data)
+        skip_reason = size_skip_reason(len(data)) or skip_reason
+        if skip_reason:
+            self._bump(f'skipped_{skip_reason}')
+            self.store.record_attachment(self._checkpoint.run_id, item, is_resume=False)
+            self._checkpoint.message_done(item['message_id'])
+            return
+        yield item
+
+    def _admit_body(self, item: dict, data: bytes):
+        """Deduplicate a message body; its kind was already set from the MIME type"""
+        content_hash = hashlib.sha1(data).hexdigest()
+        duplicate, replayed, known = self._claim_content(item, content_hash)
+        if duplicate or replayed:
+            self._checkpoint.message_done(item['message_id'], resume=replayed and bool(known['is_resume']))
+            return
+        item.pop('inline_data', None)
+        item.update(data=data, size=len(data), content_hash=content_hash)
+        yield item
+
+    def _expand_archive(self, item: dict, kind: str, data: bytes):
+        """Emit every document inside a ZIP or attached email as its own work item
+
+        Documents are emitted as they are unpacked, so extraction of the first
+        ones overlaps with decompressing the rest. The container itself is only
+        recorded once fully expanded; a replayed message expands it again and
+        relies on per-document deduplication.
+        """
+        content_hash = hashlib.sha1(data).hexdigest()
+        duplicate, _replayed, _known = self._claim_content(item, content_hash)
+        if duplicate:
+            self._checkpoint.message_done(item['message_id'])
+            return
+
+        budget = ExpansionBudget()
+        for path, payload in expand_archive(kind, data, item['filename'], budget):
+            name = posixpath.basename(path)
+            inner = dict(item, filename=name, archive_path=path, mime_type=mimetypes.guess_type(name)[0])
+            self._checkpoint.item_added(item['message_id'])
+            yield from self._admit_attachment(inner, payload)
+
+        with self._stats_lock:
+            self.stats['archives_expanded'] += budget.containers
+            self.stats['archive_entries'] += budget.entries
+            for limit, count in budget.limits_hit.items():
+                self.stats[f'archive_limit_{limit}'] += count
+            for reason, count in budget.skipped.items():
+                self.stats[f'skipped_{reason}'] += count
+        if budget.limits_hit:
+            self.add_log(f"⚠️ Archive {item['filename']} hit expansion limits: {budget.limits_hit}", 'warning',
+                         sample='archive_limits')
+        self.store.record_attachment(self._checkpoint.run_id,
+                                     dict(item, content_hash=content_hash, size=len(data)), is_resume=False)
+        self._checkpoint.message_done(item['message_id'])
+
+    def _extract_attachment(self, item: dict):
+        if item.get('source') != 'body':
+            item['text'] = extract_text(item['filename'], item['data'], item['kind'])
+            yield item
+            return
+        item['text'] = body_text(item['data'], item['kind'], item.get('charset'))
+        if len(item['text']) < BODY_MIN_CHARS:
+            # Mostly markup; the visible text is a short note
+            self.store.record_attachment(self._checkpoint.run_id, item, is_resume=False)
+            self._checkpoint.message_done(item['message_id'])
+            return
+        yield item
+
+    def _match_candidate(self, item: dict):
+        skills = match_skills(item['text'])
+        candidate = extract_fields(item['text']) if skills else None
+        # An email body mentioning a skill or two is not a resume; a pasted one lists several and a contact
+        if skills and item.get('source') == 'body' and (
+                sum(len(s) for s in skills.values()) < BODY_MIN_SKILLS
+                or not (candidate['email'] or candidate['phone'])):
+            skills = None
+        if not skills:
+            self.store.record_attachment(self._checkpoint.run_id, item, is_resume=False)
+            self._checkpoint.message_done(item['message_id'])
+            return
+        headers = item['headers']
+        candidate.update({
+            'message_id': item['message_id'],
+            'filename': item['filename'],
+            'content_hash': item['content_hash'],
+            'sender': headers.get('from', ''),
+            'subject': headers.get('subject', ''),
+            'received': headers.get('date', ''),
+            'skills': skills,
+            'skill_count': sum(len(s) for s in skills.values())
+        })
+        item['candidate'] = candidate
+        yield item
+
+    def _persist_candidate(self, item: dict):
+        candidate = item['candidate']
+        # A pasted resume stays in the email itself, so there is no file to keep in Drive
+        candidate['drive_file_id'] = (None if item.get('source') == 'body'
+                                      else self._upload_to_drive(item['filename'], item['data'], item['mime_type']))
+        candidate['run_id'] = self._checkpoint.run_id
+        candidate['created_at'] = datetime.now().isoformat()
+        with self._index_lock:
+            # Saving and indexing together means every stored id up to a snapshot's max_id is in it
+            candidate['id'] = self.store.save_candidate(self._checkpoint.run_id, candidate, item)
+            self._index_candidate(candidate)
+        self.last_scan_latencies.append((time.perf_counter() - item['listed_at']) * 1000.0)
+        self._checkpoint.message_done(item['message_id'], resume=True)
+        if item.get('source') == 'body':
+            self._bump('body_candidates')
+        yield candidate
+
+    def _export_batch(self, candidates: list):
+        if self._export_to_sheets(candidates):
+            self.store.mark_exported([c['id'] for c in candidates])
+        return candidates
+
+    def _index_candidate(self, candidate: dict):
+        self.candidates.add(candidate)
+        self.skill_index.add(candidate['id'], candidate['skills'], candidate['experience_years'],
+                             received_date(candidate), candidate['fresher'])
+
+    def _load_candidates(self):
+        """Map the search index snapshot, then index candidates stored after it"""
+        started = time.perf_counter()
+        self.candidates, self.skill_index = CandidateTable(), SkillIndex()
+        try:
+            snapshot = IndexSnapshot(SEARCH_INDEX_PATH)
+            self._check_snapshot_source(snapshot)
+            self._swap_in_snapshot(snapshot)
+        except FileNotFoundError:
+            pass
+        except (SnapshotFormatError, KeyError, ValueError) as e:
+            self.add_log(f"⚠️ Search index snapshot unusable, rebuilding from the database: {e}", 'warning')
+
+        caught_up = 0
+        for candidate in self.store.iter_candidates(after_id=self._snapshot_max_id):
+            self._index_candidate(candidate)
+            caught_up += 1
+        if len(self.candidates):
+            self.add_log(f"🧮 Search index ready in {(time.perf_counter() - started) * 1000:.0f} ms: "
+                         f"{len(self.candidates)} candidates ({caught_up} since last snapshot), "
+                         f"{len(self.skill_index.terms)} skill terms", 'info')
+        if caught_up:
+            self._save_search_snapshot_async()
+
+    def _check_snapshot_source(self, snapshot: IndexSnapshot):
+        """A snapshot only stands for the database it was built from, up to that database's newest candidate"""
+        source = snapshot.meta.get('store') or {}
+        if source.get('database_id') != self.store.database_id:
+            raise SnapshotFormatError(f"{snapshot.path} was built from another database ({source.get('path')})")
+        if snapshot.meta['candidates']['max_id'] > self.store.max_candidate_id():
+            raise SnapshotFormatError(f"{snapshot.path} holds candidates missing from {self.store.path}")
+
+    def _swap_in_snapshot(self, snapshot: IndexSnapshot):
+        candidates = CandidateTable(base=CandidateTable.from_snapshot(snapshot))
+        skill_index = SkillIndex.from_snapshot(snapshot)
+        self.candidates, self.skill_index = candidates, skill_index
+        self._snapshot_max_id = snapshot.meta['candidates']['max_id']
+
+    def save_search_snapshot(self) -> bool:
+        """Persist the search structures and remap them from the new file
+
+        The index lock is only held to copy the sections and to swap the new
+        file in, not while writing it, so persist workers keep indexing.
+        Candidates indexed in between are caught up from the database.
+        """
+        with self._snapshot_lock:
+            with self._index_lock:
+                if not len(self.candidates.ids):
+                    return False
+                sections, meta = self.candidates.snapshot_sections()
+                skill_sections, skill_meta = self.skill_index.snapshot_sections()
+            sections.update(skill_sections)
+            meta.update(skill_meta, created_at=datetime.now().isoformat(),
+                        store={'database_id': self.store.database_id, 'path': os.path.abspath(self.store.path)})
+            write_snapshot(SEARCH_INDEX_PATH, sections, meta)
+            snapshot = IndexSnapshot(SEARCH_INDEX_PATH)
+            with self._index_lock:
+                self._swap_in_snapshot(snapshot)
+                for candidate in self.store.iter_candidates(after_id=self._snapshot_max_id):
+                    self._index_candidate(candidate)
+        return True
+
+    def _save_search_snapshot_async(self):
+        def run():
+            try:
+                if self.save_search_snapshot():
+                    self.add_log(f"💾 Search index snapshot saved ({len(self.candidates)} candidates)", 'info')
+            except Exception as e:
+                self.add_log(f"❌ Search index snapshot failed: {e}", 'error')
+
+        threading.Thread(target=run, name='search-snapshot', daemon=True).start()
+
+    def filter_candidates(self, query: str = '', received_from: date = None, received_to: date = None,
+                          min_experience: float = None, max_experience: float = None,
+                          offset: int = 0, limit: int = 50) -> dict:
+        """Boolean skill filter combined with date and experience ranges
+
+        Term-only queries over 1M candidates take a fraction of a millisecond;
+        each range adds bit-sliced comparisons over the whole id space, a few
+        milliseconds at that size (see bench/filter_bench.py).
+        """
+        started = time.perf_counter()
+        result = self.skill_index.filter(query, received_from, received_to, min_experience, max_experience)
+        filter_us = (time.perf_counter() - started) * 1e6
+        candidate_ids = self.skill_index.ids(result['bitmap'], offset, limit)
+        return {
+            'success': True,
+            'total': result['count'],
+            'unknown_terms': result['unknown_terms'],
+            'filter_us': round(filter_us, 1),
+            'candidates': self.candidates.get_many(candidate_ids)
+        }
+
+    @staticmethod
+    def _iter_parts(payload: dict):
+        """Walk a Gmail message payload depth-first"""
+        stack = [payload]
+        while stack:
+            part = stack.pop()
+            yield part
+            stack.extend(reversed(part.get('parts', [])))
+
+    def _upload_to_drive(self, filename: str, data: bytes, mime_type: str = None):
+        """Store the resume file in Drive, returning its file id"""
+        if not self.drive_service:
+            return None
+        try:
+            metadata = {'name': filename}
+            if DRIVE_FOLDER_ID:
+                metadata['parents'] = [DRIVE_FOLDER_ID]
+            media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mime_type or 'application/octet-stream')
+            result = self.drive_service.files().create(body=metadata, media_body=media, fields='id').execute()
+            return result.get('id')
+        except Exception as e:
+            self.add_log(f"⚠️ Drive upload failed for {filename}: {e}", 'warning', sample='drive_upload_failed')
+            return None
+
+    def _candidate_row(self, candidate: dict) -> list:
+        """Flatten a candidate into a Sheets row"""
+        return [
+            candidate['name'],
+            candidate['email'],
+            candidate['phone'],
+            candidate['experience_years'],
+            ', '.join(s for skills in candidate['skills'].values() for s in skills),
+            candidate['skill_count'],
+            candidate['sender'],
+            candidate['received'],
+            candidate['filename'],
+            candidate['drive_file_id'] or ''
+        ]
+
+    def _export_to_sheets(self, candidates: list):
+        """Write new or changed candidate rows to the results spreadsheet"""
+        if not self.sheets_service:
+            return False
+        try:
+            if not self.spreadsheet_id:
+                sheet = self.sheets_service.spreadsheets().create(
+                    body={'properties': {'title': 'VLSI Resume Scanner Results'}},
+                    fields='spreadsheetId'
+                ).execute()
+                self.spreadsheet_id = sheet['spreadsheetId']
+                self.store.save_spreadsheet_id(self.spreadsheet_id)
+                self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=self.spreadsheet_id, range='A1', valueInputOption='RAW',
+                    body={'values': [CANDIDATE_HEADER]}
+                ).execute()
+                self.add_log(f"📋 Created results spreadsheet {self.spreadsheet_id}", 'info')
+
+            counts = self.sheet_sync.sync(self.sheets_service, self.spreadsheet_id,
+                                          {c['id']: self._candidate_row(c) for c in candidates})
+            with self._stats_lock:
+                for outcome in ('inserted', 'updated', 'unchanged'):
+                    self.stats[f'sheet_rows_{outcome}'] += counts[outcome]
+            return True
+        except Exception as e:
+            self.add_log(f"❌ Sheets export failed: {e}", 'error')
+            return False
+
 # Initialize scanner
 scanner = VLSIResumeScanner()
 
+def run_scan_job(job, ticket) -> dict:
+    """Scheduler runner: one incremental (or, when requested, full) scan of a label"""
+    if not scanner.gmail_service:
+        return {'success': False, 'skipped': not ticket.interactive, 'error': 'Gmail authentication required'}
+    workers = None if ticket.interactive else SCHEDULED_SCAN_WORKERS
+    result = scanner.incremental_scan(job.label_id, full=ticket.full, workers=workers)
+    if PUSH in ticket.sources:
+        scanner._bump('push_scans')
+    return result
+
+scan_scheduler = ScanScheduler(run_scan_job, max_concurrent=SCAN_MAX_CONCURRENT,
+                               per_account_limit=SCAN_ACCOUNT_CONCURRENCY, jitter=SCAN_SCHEDULE_JITTER)
+# INBOX is always registered so manual and push triggers have a job to fold into
+for label_id in dict.fromkeys(['INBOX', *SCAN_SCHEDULE]):
+    scan_scheduler.add_job(label_id, 'me', label_id, SCAN_SCHEDULE.get(label_id))
+
+def handle_push(email_address: str, history_id: int):
+    """Push coalescer handler: hand new INBOX history to the scheduler, which runs it in the background"""
+    if scanner.gmail_service and scanner.push_needs_scan(email_address, history_id):
+        scan_scheduler.trigger('INBOX', PUSH)
+
+push_coalescer = PushCoalescer(handle_push, window_seconds=PUSH_COALESCE_SECONDS)
+
 # RAILWAY FIX 8: Optimized main route to prevent timeout
 @app.route('/')
 def index():
@@ -799,7 +1717,10 @@ def index():
                 fetch('/api/scan-emails', { method: 'POST' })
                 .then(r => r.json())
                 .then(data => {
-                    if (data.success) {
+                    if (data.queued) {
+                        document.getElementById('scan-results').innerHTML = 
+                            `<p>⏳ Scan ${data.scan.state} in the background. Check the logs for progress.</p>`;
+                    } else if (data.success) {
                         document.getElementById('scan-results').innerHTML = 
                             `<p>✅ Scan completed! Found ${data.resumes_found || 0} resumes in ${data.emails_scanned || 0} emails.</p>`;
                     } else {
@@ -893,6 +1814,8 @@ def api_status():
         status = scanner.get_system_status()
         status['timestamp'] = datetime.now().isoformat()
         status['railway_environment'] = bool(os.environ.get('RAILWAY_ENVIRONMENT'))
+        status['push'] = dict(push_coalescer.stats, pending=push_coalescer.pending())
+        status['scheduler'] = scan_scheduler.status()
         
         return jsonify(status)
     except Exception as e:
@@ -934,26 +1857,141 @@ def api_scan_emails():
             
         if not scanner.gmail_service:
             return jsonify({'success': False, 'error': 'Gmail authentication required'})
-            
-        # This is a placeholder - implement actual email scanning logic
-        scanner.add_log("📧 Starting email scan", 'info')
-        
-        # Simulate scanning
-        scanner.stats['total_emails'] = 50
-        scanner.stats['resumes_found'] = 5
-        scanner.stats['last_scan_time'] = datetime.now().isoformat()
-        
-        scanner.add_log("✅ Email scan completed", 'info')
-        
+
+        # Answer right away; repeated clicks join the queued or running scan. The scan is
+        # incremental unless {"full": true} is posted or INBOX has never been scanned
+        full = bool((request.get_json(silent=True) or {}).get('full'))
+        ticket = scan_scheduler.trigger('INBOX', MANUAL, full=full)
+        return jsonify({'success': True, 'queued': True, 'scan': ticket.state(),
+                        'message': 'Scan is running in the background'}), 202
+    except Exception as e:
+        scanner.add_log(f"❌ Email scan failed: {e}", 'error')
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/gmail/push', methods=['POST'])
+def api_gmail_push():
+    """Receive Gmail watch notifications delivered by Pub/Sub push"""
+    # Without a shared secret anyone could trigger scans, so an unconfigured endpoint stays closed
+    if not PUBSUB_VERIFICATION_TOKEN:
+        return jsonify({'error': 'Push endpoint disabled: PUBSUB_VERIFICATION_TOKEN not configured'}), 403
+    if not hmac.compare_digest(request.args.get('token', ''), PUBSUB_VERIFICATION_TOKEN):
+        return jsonify({'error': 'Invalid verification token'}), 403
+
+    try:
+        email_address, history_id = parse_push_envelope(request.get_json(silent=True))
+    except PushPayloadError as e:
+        # Acknowledge malformed messages so Pub/Sub does not redeliver them forever
+        scanner.add_log(f"⚠️ Ignoring malformed push notification: {e}", 'warning', sample='malformed_push')
+        return jsonify({'success': False, 'error': str(e)}), 200
+
+    push_coalescer.submit(email_address, history_id)
+    return '', 204
+
+@app.route('/api/gmail/watch', methods=['POST'])
+def api_gmail_watch():
+    """Register (or renew) the Gmail watch on the configured Pub/Sub topic"""
+    try:
+        if not session.get('admin_authenticated'):
+            return jsonify({'error': 'Authentication required'}), 401
+
+        data = request.get_json(silent=True) or {}
+        result = scanner.start_watch(data.get('topic_name') or GMAIL_PUBSUB_TOPIC)
+        return jsonify(result)
+    except Exception as e:
+        scanner.add_log(f"❌ Gmail watch failed: {e}", 'error')
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/scan-runs')
+def api_scan_runs():
+    """Recent scan runs with their checkpoint state"""
+    try:
+        if not session.get('admin_authenticated'):
+            return jsonify({'error': 'Authentication required'}), 401
+
+        return jsonify({'success': True, 'runs': scanner.store.list_runs(int(request.args.get('limit', 20)))})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/candidates/filter')
+def api_filter_candidates():
+    """Filter candidates, e.g. ?q=UVM AND SystemVerilog AND NOT fresher AND (Cadence OR Synopsys)"""
+    try:
+        if not session.get('admin_authenticated'):
+            return jsonify({'error': 'Authentication required'}), 401
+
+        args = request.args
+        received_from = date.fromisoformat(args['received_from']) if args.get('received_from') else None
+        received_to = date.fromisoformat(args['received_to']) if args.get('received_to') else None
+        min_experience = float(args['min_experience']) if args.get('min_experience') else None
+        max_experience = float(args['max_experience']) if args.get('max_experience') else None
+        offset = int(args.get('offset', 0))
+        limit = min(int(args.get('limit', 50)), CANDIDATE_PAGE_LIMIT)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid parameter: {e}'}), 400
+
+    try:
+        result = scanner.filter_candidates(args.get('q', ''), received_from, received_to,
+                                           min_experience, max_experience, offset, limit)
+        return jsonify(result)
+    except FilterQueryError as e:
+        return jsonify({'success': False, 'error': f'Invalid filter: {e}'}), 400
+    except Exception as e:
+        scanner.add_log(f"❌ Candidate filter failed: {e}", 'error')
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/candidates')
+def api_candidates():
+    """Keyset-paginated candidate listing; pass next_cursor back as ?cursor= for the next page"""
+    if not session.get('admin_authenticated'):
+        return jsonify({'error': 'Authentication required'}), 401
+    try:
+        after_id = int(request.args.get('cursor') or 0)
+        limit = max(1, min(int(request.args.get('limit', 50)), CANDIDATE_PAGE_LIMIT))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid parameter: {e}'}), 400
+
+    try:
+        candidates = scanner.store.list_candidates(after_id, limit + 1)
+        has_more = len(candidates) > limit
+        candidates = candidates[:limit]
         return jsonify({
             'success': True,
-            'emails_scanned': scanner.stats['total_emails'],
-            'resumes_found': scanner.stats['resumes_found']
+            'candidates': candidates,
+            'next_cursor': str(candidates[-1]['id']) if has_more else None
         })
     except Exception as e:
-        scanner.add_log(f"❌ Email scan failed: {e}", 'error')
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/candidates/export.<fmt>')
+def api_export_candidates(fmt):
+    """Stream every stored candidate as CSV, NDJSON or XLSX"""
+    if not session.get('admin_authenticated'):
+        return jsonify({'error': 'Authentication required'}), 401
+
+    def rows():
+        for candidate in scanner.store.iter_candidates(batch_size=1000):
+            yield [candidate['id']] + scanner._candidate_row(candidate)
+
+    def records():
+        for candidate in scanner.store.iter_candidates(batch_size=1000):
+            yield {field: candidate[field] for field in CANDIDATE_FIELDS}
+
+    header = ['ID'] + CANDIDATE_HEADER
+    if fmt == 'csv':
+        body, mimetype = iter_csv(header, rows()), 'text/csv'
+    elif fmt == 'ndjson':
+        body, mimetype = iter_ndjson(records()), 'application/x-ndjson'
+    elif fmt == 'xlsx':
+        body = iter_xlsx(header, rows(), sheet_name='Candidates')
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        return jsonify({'success': False, 'error': f'Unsupported export format: {fmt}'}), 404
+
+    filename = f"vlsi_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    scanner.add_log(f"📤 Streaming {fmt.upper()} candidate export", 'info')
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @app.route('/api/clear-logs', methods=['POST'])
 def api_clear_logs():
     """Clear system logs"""
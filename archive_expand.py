@@ -0,0 +1,185 @@
+"""Streaming expansion of ZIP archives and attached emails
+
+Agencies send batches of resumes as one ZIP, and forwarded applications
+arrive as .eml attachments. `expand_archive` walks such a container in
+memory and yields every file inside it as (path, bytes), descending into
+nested ZIPs and emails, so each inner document can go straight to the
+extract stage without touching disk.
+
+ZIP members are decompressed in chunks and counted against an
+`ExpansionBudget` as they are read, so the sizes claimed in the archive
+headers are never trusted. One budget covers a top-level attachment and
+everything nested in it:
+
+- depth: nested containers beyond ARCHIVE_MAX_DEPTH are not opened
+- entries: at most ARCHIVE_MAX_ENTRIES files are yielded in total
+- bytes: at most ARCHIVE_MAX_BYTES are decompressed in total
+
+Hitting the entries or bytes limit stops the expansion (what was yielded
+so far is kept); a single member over MAX_ATTACHMENT_BYTES is skipped.
+"""
+import io
+import os
+import zlib
+import zipfile
+import posixpath
+from email import message_from_bytes, policy
+
+from attachment_sniff import MAX_ATTACHMENT_BYTES, SNIFF_BYTES, inspect_attachment, sniff_format
+
+ARCHIVE_MAX_DEPTH = int(os.environ.get('ARCHIVE_MAX_DEPTH', 2))
+ARCHIVE_MAX_ENTRIES = int(os.environ.get('ARCHIVE_MAX_ENTRIES', 200))
+ARCHIVE_MAX_BYTES = int(os.environ.get('ARCHIVE_MAX_BYTES', 100 * 1024 * 1024))
+READ_CHUNK = 64 * 1024
+
+# Every limit an expansion can hit; the scanner keeps an archive_limit_<limit> counter for each
+LIMITS = ('depth', 'entries', 'bytes')
+
+ARCHIVE_EXTENSIONS = ('.zip', '.eml')
+ARCHIVE_MIME_TYPES = ('application/zip', 'application/x-zip-compressed', 'message/rfc822')
+
+_IGNORED_PREFIXES = ('__MACOSX/',)
+
+
+def is_archive_part(filename: str, mime_type: str) -> bool:
+    """Whether a MIME part is a container worth downloading and expanding"""
+    return (filename or '').lower().endswith(ARCHIVE_EXTENSIONS) or (mime_type or '').lower() in ARCHIVE_MIME_TYPES
+
+
+def archive_kind(filename: str, mime_type: str, data: bytes):
+    """'zip' or 'eml' for an expandable container, otherwise None
+
+    Office documents are ZIPs too, so the central directory decides; emails
+    have no magic bytes and are recognised by their declared type or name.
+    """
+    kind = sniff_format(data[:SNIFF_BYTES])
+    if kind == 'zip':
+        return 'zip' if inspect_attachment(data)[0] == 'zip' else None
+    if kind == 'unknown' and ((mime_type or '').lower() == 'message/rfc822'
+                              or (filename or '').lower().endswith('.eml')):
+        return 'eml'
+    return None
+
+
+class ExpansionBudget:
+    """Limits and counters shared by one top-level container and everything nested in it"""
+
+    def __init__(self, max_depth: int = ARCHIVE_MAX_DEPTH, max_entries: int = ARCHIVE_MAX_ENTRIES,
+                 max_bytes: int = ARCHIVE_MAX_BYTES):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = 0
+        self.bytes = 0
+        self.containers = 0
+        self.limits_hit = {}
+        self.skipped = {}
+
+    @property
+    def exhausted(self) -> bool:
+        return 'entries' in self.limits_hit or 'bytes' in self.limits_hit
+
+    def hit(self, limit: str):
+        self.limits_hit[limit] = self.limits_hit.get(limit, 0) + 1
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def take_entry(self) -> bool:
+        if self.entries >= self.max_entries:
+            self.hit('entries')
+            return False
+        self.entries += 1
+        return True
+
+    def take_bytes(self, count: int) -> bool:
+        self.bytes += count
+        if self.bytes > self.max_bytes:
+            self.hit('bytes')
+            return False
+        return True
+
+
+def expand_archive(kind: str, data: bytes, container: str, budget: ExpansionBudget, depth: int = 1):
+    """Yield (path, bytes) for every file in a container, recursing into nested ones
+
+    `path` is `container/member`, joined with '/' at every level.
+    """
+    budget.containers += 1
+    members = _zip_members(data, budget) if kind == 'zip' else _email_members(data, budget)
+    for name, payload in members:
+        path = f"{container}/{name}"
+        inner = archive_kind(name, None, payload)
+        if inner is None:
+            yield path, payload
+        elif depth >= budget.max_depth:
+            budget.hit('depth')
+        else:
+            yield from expand_archive(inner, payload, path, budget, depth + 1)
+        if budget.exhausted:
+            return
+
+
+def _zip_members(data: bytes, budget: ExpansionBudget):
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except (zipfile.BadZipFile, zipfile.LargeZipFile):
+        budget.skip('unsupported_format')
+        return
+    for info in archive.infolist():
+        if info.is_dir() or info.filename.startswith(_IGNORED_PREFIXES):
+            continue
+        if not budget.take_entry():
+            return
+        if info.flag_bits & 0x1:
+            # Password-protected member
+            budget.skip('unsupported_format')
+            continue
+        payload = _read_member(archive, info, budget)
+        if budget.exhausted:
+            return
+        if payload is not None:
+            yield info.filename, payload
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, budget: ExpansionBudget):
+    """Decompress one member chunk by chunk, giving up as soon as a limit is crossed"""
+    chunks = []
+    size = 0
+    try:
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if not budget.take_bytes(len(chunk)):
+                    return None
+                if size > MAX_ATTACHMENT_BYTES:
+                    budget.skip('too_large')
+                    return None
+                chunks.append(chunk)
+    except (zipfile.BadZipFile, zlib.error, NotImplementedError, EOFError):
+        budget.skip('unsupported_format')
+        return None
+    return b''.join(chunks)
+
+
+def _email_members(data: bytes, budget: ExpansionBudget):
+    """Named, non-empty leaf parts of an email, including those of forwarded messages inside it"""
+    message = message_from_bytes(data, policy=policy.default)
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        filename = part.get_filename()
+        if not filename:
+            continue
+        payload = part.get_payload(decode=True)
+        if not payload:
+            continue
+        if not budget.take_entry() or not budget.take_bytes(len(payload)):
+            return
+        if len(payload) > MAX_ATTACHMENT_BYTES:
+            budget.skip('too_large')
+            continue
+        yield posixpath.basename(filename.replace('\\', '/')), payload
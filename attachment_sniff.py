@@ -0,0 +1,149 @@
+"""Cheap pre-parse triage of attachments
+
+Full parsing (PyPDF2, python-docx) dominates scan CPU, and it is slowest
+on exactly the files that can never yield a resume: images, PDFs locked
+behind a user password, scanned PDFs without a text layer, legacy binary formats. This
+module decides from the declared size and the leading bytes what an
+attachment really is, so only plausible resumes reach the extract stage.
+
+`inspect_attachment` returns (kind, skip_reason); a None skip_reason means
+the attachment should be parsed as `kind`.
+"""
+import io
+import os
+import zipfile
+
+# Only needed to tell owner-password-only PDFs (which open without a password) from locked ones
+try:
+    import PyPDF2
+    PDF_DECRYPT_AVAILABLE = True
+except ImportError:
+    try:
+        import pypdf as PyPDF2
+        PDF_DECRYPT_AVAILABLE = True
+    except ImportError:
+        PDF_DECRYPT_AVAILABLE = False
+
+SNIFF_BYTES = 8192
+TRAILER_BYTES = 4096
+
+MIN_ATTACHMENT_BYTES = int(os.environ.get('ATTACHMENT_MIN_BYTES', 512))
+MAX_ATTACHMENT_BYTES = int(os.environ.get('ATTACHMENT_MAX_BYTES', 10 * 1024 * 1024))
+
+# Every reason an attachment can be skipped; the scanner keeps a skipped_<reason> counter for each
+SKIP_REASONS = ('not_document', 'too_small', 'too_large', 'unsupported_format',
+                'legacy_doc', 'encrypted_pdf', 'image_only_pdf')
+
+# Formats the extract stage can turn into text
+PARSEABLE = ('pdf', 'docx')
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.doc', '.rtf')
+DOCUMENT_MIME_TYPES = (
+    'application/pdf',
+    'application/msword',
+    'application/rtf',
+    'text/rtf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+)
+
+_SIGNATURES = (
+    (b'%PDF-', 'pdf'),
+    (b'PK\x03\x04', 'zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (b'{\\rtf', 'rtf'),
+    (b'\x89PNG\r\n\x1a\n', 'image'),
+    (b'\xff\xd8\xff', 'image'),
+    (b'GIF87a', 'image'),
+    (b'GIF89a', 'image'),
+    (b'II*\x00', 'image'),
+    (b'MM\x00*', 'image'),
+    (b'BM', 'image')
+)
+
+
+def is_document_part(filename: str, mime_type: str) -> bool:
+    """Whether a MIME part is worth downloading at all"""
+    return (filename or '').lower().endswith(DOCUMENT_EXTENSIONS) or (mime_type or '').lower() in DOCUMENT_MIME_TYPES
+
+
+def size_skip_reason(size: int, max_bytes: int = None):
+    """Reject by the size Gmail declares for the part, before downloading it"""
+    if size is None:
+        return None
+    if size < MIN_ATTACHMENT_BYTES:
+        return 'too_small'
+    if size > (max_bytes or MAX_ATTACHMENT_BYTES):
+        return 'too_large'
+    return None
+
+
+def sniff_format(head: bytes) -> str:
+    """Container format from the leading bytes: pdf, zip, ole, rtf, image or unknown"""
+    # PDF readers accept junk before the header, so allow a little leading garbage
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    for signature, kind in _SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    return 'unknown'
+
+
+def _zip_kind(data: bytes) -> str:
+    """docx, another OOXML document or a plain zip, from the central directory only"""
+    try:
+        names = set(zipfile.ZipFile(io.BytesIO(data)).namelist())
+    except zipfile.BadZipFile:
+        return 'unknown'
+    if 'word/document.xml' in names:
+        return 'docx'
+    if '[Content_Types].xml' in names:
+        return 'ooxml'
+    return 'zip'
+
+
+def opens_without_password(data: bytes) -> bool:
+    """Whether an encrypted PDF accepts the empty user password
+
+    Resume builders often set only an owner password (restricting printing
+    or copying); such files decrypt with an empty user password and parse
+    like any other PDF. Without a PDF library the extract stage decides.
+    """
+    if not PDF_DECRYPT_AVAILABLE:
+        return True
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return not reader.is_encrypted or bool(reader.decrypt(''))
+    except Exception:
+        return False
+
+
+def pdf_skip_reason(data: bytes):
+    """Spot password-locked and text-less PDFs without parsing their pages
+
+    The encryption dictionary is referenced from the trailer, which sits at
+    the end of the file (or, in linearized files, near the start); only
+    files carrying one are opened, to check the empty user password. A PDF
+    with images but no font resources has no text layer to extract; when
+    objects are packed into compressed object streams the font references
+    are invisible, so those files are left for the parser to judge.
+    """
+    if b'/Encrypt' in data[-TRAILER_BYTES:] or b'/Encrypt' in data[:SNIFF_BYTES]:
+        if not opens_without_password(data):
+            return 'encrypted_pdf'
+    if b'/Font' not in data and b'/ObjStm' not in data and b'/Image' in data:
+        return 'image_only_pdf'
+    return None
+
+
+def inspect_attachment(data: bytes) -> tuple:
+    """(kind, skip_reason) for a downloaded attachment"""
+    kind = sniff_format(data[:SNIFF_BYTES])
+    if kind == 'pdf':
+        return kind, pdf_skip_reason(data)
+    if kind == 'zip':
+        kind = _zip_kind(data)
+    if kind == 'ole':
+        return 'doc', 'legacy_doc'
+    if kind in PARSEABLE:
+        return kind, None
+    return kind, 'unsupported_format'
@@ -0,0 +1,341 @@
+"""In-process fakes of the Gmail, Drive and Sheets clients
+
+The fakes mirror the chained resource style of googleapiclient
+(`service.users().messages().list(...).execute()`), add configurable
+per-call latency and enforce per-second quota budgets by throttling,
+the way a well-behaved client backs off on 429s.
+"""
+import time
+import random
+import threading
+from collections import Counter
+
+# Quota units per call, following the published Gmail API costs
+GMAIL_QUOTA_COSTS = {
+    'getProfile': 1,
+    'messages.list': 5,
+    'messages.get': 5,
+    'attachments.get': 5,
+    'history.list': 2,
+    'watch': 100
+}
+GMAIL_UNITS_PER_SECOND = 250
+DRIVE_REQUESTS_PER_SECOND = 100
+SHEETS_WRITES_PER_SECOND = 1
+
+
+class FakeHttpError(Exception):
+    """Stand-in for googleapiclient.errors.HttpError"""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.status = status
+        self.reason = reason
+
+
+class QuotaBucket:
+    """Token bucket that blocks callers until quota is available"""
+
+    def __init__(self, rate_per_second: float):
+        self.rate = rate_per_second
+        self.tokens = rate_per_second
+        self.updated = time.monotonic()
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, units: float = 1):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= units:
+                    self.tokens -= units
+                    return
+                wait = (units - self.tokens) / self.rate
+                self.throttled_seconds += wait
+            time.sleep(wait)
+
+
+class FakeBackend:
+    """Shared latency, quota and call accounting for one fake service"""
+
+    def __init__(self, name: str, latency_ms: float = 0.0, quota: QuotaBucket = None, seed: int = 0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.quota = quota
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, method: str, handler, cost: float = 1):
+        with self._lock:
+            self.calls[method] += 1
+            jitter = self._rng.uniform(0.5, 1.5)
+        if self.quota:
+            self.quota.consume(cost)
+        if self.latency_ms:
+            time.sleep(self.latency_ms * jitter / 1000.0)
+        return handler()
+
+
+class FakeRequest:
+    """Deferred call returned by every fake resource method"""
+
+    def __init__(self, backend: FakeBackend, method: str, handler, cost: float = 1):
+        self._backend = backend
+        self._method = method
+        self._handler = handler
+        self._cost = cost
+
+    def execute(self, num_retries: int = 0):
+        return self._backend.call(self._method, self._handler, self._cost)
+
+
+class _Resource:
+    """Attribute-chained resource node: sub-resources are called with no
+    arguments, methods are called with API keyword arguments"""
+
+    def __init__(self, **children):
+        self._children = children
+
+    def __getattr__(self, name):
+        try:
+            child = self._children[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        if isinstance(child, _Resource):
+            return lambda: child
+        return child
+
+
+# ---------------------------------------------------------------- Gmail
+
+class FakeGmailService:
+    """Serves a SyntheticMailbox through the Gmail v1 API surface"""
+
+    def __init__(self, mailbox, latency_ms: float = 0.0, units_per_second: float = GMAIL_UNITS_PER_SECOND,
+                 seed: int = 0):
+        self.mailbox = mailbox
+        self.backend = FakeBackend('gmail', latency_ms, QuotaBucket(units_per_second), seed)
+        self._by_id = {m['id']: m for m in mailbox.messages}
+        self._lock = threading.Lock()
+
+        messages = _Resource(
+            list=self._list,
+            get=self._get,
+            attachments=_Resource(get=self._get_attachment)
+        )
+        history = _Resource(list=self._history_list)
+        self._users = _Resource(messages=messages, history=history, getProfile=self._get_profile,
+                                watch=self._watch)
+
+    def users(self):
+        return self._users
+
+    def deliver(self, message: dict, attachments: dict = None):
+        """Add a new message to the mailbox as if it had just arrived"""
+        with self._lock:
+            self.mailbox.add_message(message, attachments)
+            self._by_id[message['id']] = message
+
+    def _request(self, method, handler):
+        return FakeRequest(self.backend, method, handler, GMAIL_QUOTA_COSTS.get(method, 1))
+
+    def _get_profile(self, userId='me'):
+        return self._request('getProfile', lambda: {
+            'emailAddress': self.mailbox.email_address,
+            'messagesTotal': len(self.mailbox.messages),
+            'historyId': str(self.mailbox.history_id)
+        })
+
+    def _watch(self, userId='me', body=None):
+        return self._request('watch', lambda: {
+            'historyId': str(self.mailbox.history_id),
+            'expiration': str(int((time.time() + 7 * 86400) * 1000))
+        })
+
+    def _history_list(self, userId='me', startHistoryId=None, historyTypes=None, labelId=None,
+                      pageToken=None, maxResults=100):
+        def handler():
+            with self._lock:
+                records = [r for r in self.mailbox.history if r[0] > int(startHistoryId)]
+                current = self.mailbox.history_id
+            start = int(pageToken or 0)
+            page = records[start:start + maxResults]
+            response = {
+                'history': [{'id': str(hid), 'messagesAdded': [{'message': {'id': mid, 'threadId': tid}}]}
+                            for hid, mid, tid in page],
+                'historyId': str(current)
+            }
+            if start + maxResults < len(records):
+                response['nextPageToken'] = str(start + maxResults)
+            return response
+        return self._request('history.list', handler)
+
+    def _list(self, userId='me', q=None, pageToken=None, maxResults=100, labelIds=None):
+        def handler():
+            with self._lock:
+                ordered = self.mailbox.messages[::-1]
+            start = int(pageToken or 0)
+            page = ordered[start:start + maxResults]
+            response = {
+                'messages': [{'id': m['id'], 'threadId': m['threadId']} for m in page],
+                'resultSizeEstimate': len(ordered)
+            }
+            if start + maxResults < len(ordered):
+                response['nextPageToken'] = str(start + maxResults)
+            return response
+        return self._request('messages.list', handler)
+
+    def _get(self, userId='me', id=None, format='full', metadataHeaders=None):
+        def handler():
+            message = self._by_id.get(id)
+            if message is None:
+                raise FakeHttpError(404, f"Message {id} not found")
+            if format == 'full':
+                return message
+            result = {k: v for k, v in message.items() if k != 'payload'}
+            if format == 'metadata':
+                payload = message['payload']
+                headers = payload['headers']
+                if metadataHeaders:
+                    wanted = {h.lower() for h in metadataHeaders}
+                    headers = [h for h in headers if h['name'].lower() in wanted]
+                result['payload'] = {'mimeType': payload['mimeType'], 'headers': headers}
+            return result
+        return self._request('messages.get', handler)
+
+    def _get_attachment(self, userId='me', messageId=None, id=None):
+        def handler():
+            data = self.mailbox.attachments.get(id)
+            if data is None:
+                raise FakeHttpError(404, f"Attachment {id} not found")
+            return {'attachmentId': id, 'size': len(data) * 3 // 4, 'data': data}
+        return self._request('attachments.get', handler)
+
+
+# ---------------------------------------------------------------- Drive
+
+class FakeDriveService:
+    """Accepts uploads and keeps only their sizes"""
+
+    def __init__(self, latency_ms: float = 0.0, requests_per_second: float = DRIVE_REQUESTS_PER_SECOND,
+                 seed: int = 0):
+        self.backend = FakeBackend('drive', latency_ms, QuotaBucket(requests_per_second), seed)
+        self.files_created = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._files = _Resource(create=self._create)
+        self._about = _Resource(get=self._about_get)
+
+    def files(self):
+        return self._files
+
+    def about(self):
+        return self._about
+
+    def _create(self, body=None, media_body=None, fields=None):
+        def handler():
+            size = 0
+            if media_body is not None and hasattr(media_body, 'size'):
+                size = media_body.size() or 0
+            with self._lock:
+                self._next_id += 1
+                file_id = f"drive-{self._next_id:08d}"
+                self.files_created[file_id] = {'name': (body or {}).get('name'), 'size': size}
+            return {'id': file_id}
+        return FakeRequest(self.backend, 'files.create', handler)
+
+    def _about_get(self, fields=None):
+        return FakeRequest(self.backend, 'about.get', lambda: {'user': {'displayName': 'Fake User'}})
+
+
+# ---------------------------------------------------------------- Sheets
+
+def _row_index(cell_range: str) -> int:
+    """Return the zero-based first row of an A1 range like 'Sheet1!A5:J9'"""
+    cell = cell_range.split('!')[-1].split(':')[0]
+    digits = ''.join(ch for ch in cell if ch.isdigit())
+    return int(digits) - 1 if digits else 0
+
+
+class FakeSheetsService:
+    """Keeps one in-memory grid per spreadsheet and counts writes"""
+
+    def __init__(self, latency_ms: float = 0.0, writes_per_second: float = SHEETS_WRITES_PER_SECOND,
+                 seed: int = 0):
+        self.backend = FakeBackend('sheets', latency_ms, QuotaBucket(writes_per_second), seed)
+        self.grids = {}
+        self.cells_written = 0
+        self._lock = threading.Lock()
+        values = _Resource(update=self._update, append=self._append, batchUpdate=self._batch_update,
+                           get=self._values_get)
+        self._spreadsheets = _Resource(create=self._create, values=values)
+
+    def spreadsheets(self):
+        return self._spreadsheets
+
+    def _write(self, spreadsheet_id, start_row, rows):
+        grid = self.grids.setdefault(spreadsheet_id, [])
+        while len(grid) < start_row + len(rows):
+            grid.append([])
+        for offset, row in enumerate(rows):
+            grid[start_row + offset] = list(row)
+            self.cells_written += len(row)
+
+    def _create(self, body=None, fields=None):
+        def handler():
+            with self._lock:
+                spreadsheet_id = f"sheet-{len(self.grids) + 1:04d}"
+                self.grids[spreadsheet_id] = []
+            return {'spreadsheetId': spreadsheet_id}
+        return FakeRequest(self.backend, 'spreadsheets.create', handler)
+
+    def _update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None):
+        def handler():
+            with self._lock:
+                self._write(spreadsheetId, _row_index(range), body.get('values', []))
+            return {'updatedRange': range}
+        return FakeRequest(self.backend, 'values.update', handler)
+
+    def _append(self, spreadsheetId=None, range=None, valueInputOption=None, insertDataOption=None, body=None):
+        def handler():
+            with self._lock:
+                grid = self.grids.setdefault(spreadsheetId, [])
+                self._write(spreadsheetId, len(grid), body.get('values', []))
+            return {'updates': {'updatedRows': len(body.get('values', []))}}
+        return FakeRequest(self.backend, 'values.append', handler)
+
+    def _batch_update(self, spreadsheetId=None, body=None):
+        def handler():
+            with self._lock:
+                for value_range in body.get('data', []):
+                    self._write(spreadsheetId, _row_index(value_range['range']), value_range.get('values', []))
+            return {'totalUpdatedRows': sum(len(d.get('values', [])) for d in body.get('data', []))}
+        return FakeRequest(self.backend, 'values.batchUpdate', handler)
+
+    def _values_get(self, spreadsheetId=None, range=None):
+        def handler():
+            with self._lock:
+                return {'range': range, 'values': [list(r) for r in self.grids.get(spreadsheetId, [])]}
+        return FakeRequest(self.backend, 'values.get', handler, cost=0)
+
+
+def install_fakes(scanner, mailbox, latency_ms: float = 0.0, quota_scale: float = 1.0, seed: int = 0) -> dict:
+    """Attach fake services to a VLSIResumeScanner and return them"""
+    def scaled(rate):
+        return rate * quota_scale if quota_scale else 0
+
+    services = {
+        'gmail': FakeGmailService(mailbox, latency_ms, scaled(GMAIL_UNITS_PER_SECOND), seed),
+        'drive': FakeDriveService(latency_ms, scaled(DRIVE_REQUESTS_PER_SECOND), seed + 1),
+        'sheets': FakeSheetsService(latency_ms, scaled(SHEETS_WRITES_PER_SECOND), seed + 2)
+    }
+    scanner.gmail_service = services['gmail']
+    scanner.drive_service = services['drive']
+    scanner.sheets_service = services['sheets']
+    scanner.current_user_email = mailbox.email_address
+    return services
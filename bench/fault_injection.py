@@ -0,0 +1,177 @@
+"""Kill a scan midway and verify that the next scan resumes it
+
+The scan runs in a child process against the fake Gmail service. After a
+configurable number of message fetches the child hard-exits (os._exit,
+like a SIGKILL from gunicorn's --timeout), leaving its checkpoint behind.
+A second child then triggers an ordinary manual scan through the scheduler
+with the same data directory, after a push has already set an INBOX
+history cursor. The check passes when the resumed run:
+
+  * refetches none of the messages the checkpoint marked as finished,
+  * covers every message in the mailbox between the two attempts,
+  * ends with the same candidates as an uninterrupted scan, all exported,
+  * leaves the history baseline of the interrupted run behind, and none before.
+
+Usage:
+    python -m bench.fault_injection --messages 400 --crash-after 150
+"""
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+import tempfile
+import subprocess
+
+CRASH_EXIT_CODE = 137
+
+
+def run_child(data_dir: str, messages: int, seed: int, crash_after: int, fetch_log: str,
+              resume: bool = False) -> dict:
+    """Scan in this process, optionally dying after `crash_after` message fetches
+
+    With `resume` the child triggers the scan the dashboard would, which has
+    to pick up the interrupted full scan; otherwise it starts a full scan.
+    """
+    os.environ['DATA_DIR'] = data_dir
+    logging.disable(logging.WARNING)
+    import app as scanner_app
+    from scan_scheduler import MANUAL
+    from bench.synthetic import generate_mailbox
+    from bench.fake_google import install_fakes
+
+    mailbox = generate_mailbox(messages, seed=seed)
+    services = install_fakes(scanner_app.scanner, mailbox, latency_ms=2, quota_scale=0, seed=seed)
+    gmail = services['gmail']
+    fetched = open(fetch_log, 'a')
+    call = gmail.backend.call
+    count = {'gets': 0}
+
+    def call_with_fault(method, handler, cost=1):
+        result = call(method, handler, cost)
+        if method == 'messages.get':
+            fetched.write(result['id'] + '\n')
+            fetched.flush()
+            count['gets'] += 1
+            if crash_after and count['gets'] >= crash_after:
+                os._exit(CRASH_EXIT_CODE)
+        return result
+
+    gmail.backend.call = call_with_fault
+    if resume:
+        # A push processed after the restart sets an INBOX cursor of its own
+        scanner_app.scanner.push_needs_scan(mailbox.email_address, mailbox.history_id)
+        result = scanner_app.scan_scheduler.trigger('INBOX', MANUAL).wait()
+    else:
+        result = scanner_app.scanner.scan_emails()
+    result.pop('pipeline', None)
+    result['sheet_rows'] = sum(max(0, len(grid) - 1) for grid in services['sheets'].grids.values())
+    return result
+
+
+def spawn(data_dir: str, messages: int, seed: int, crash_after: int, fetch_log: str, interval: float,
+          resume: bool = False):
+    env = dict(os.environ, CHECKPOINT_INTERVAL_SECONDS=str(interval))
+    return subprocess.run(
+        [sys.executable, '-m', 'bench.fault_injection', '--child', '--data-dir', data_dir,
+         '--messages', str(messages), '--seed', str(seed), '--crash-after', str(crash_after),
+         '--fetch-log', fetch_log] + (['--resume'] if resume else []),
+        env=env, capture_output=True, text=True
+    )
+
+
+def read_lines(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def query(db_path: str, sql: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def run_check(messages: int, crash_after: int, seed: int, interval: float) -> dict:
+    from bench.synthetic import generate_mailbox
+
+    all_ids = {m['id'] for m in generate_mailbox(messages, seed=seed).messages}
+    work = tempfile.mkdtemp(prefix='vlsi-fault-')
+    crashed_dir, clean_dir = os.path.join(work, 'crashed'), os.path.join(work, 'clean')
+    first_log, second_log = os.path.join(work, 'first.log'), os.path.join(work, 'second.log')
+
+    reference = spawn(clean_dir, messages, seed, 0, os.path.join(work, 'clean.log'), interval)
+    first = spawn(crashed_dir, messages, seed, crash_after, first_log, interval)
+
+    db_path = os.path.join(crashed_dir, 'scanner.db')
+    runs = query(db_path, 'SELECT run_id, status FROM scan_runs')
+    checkpointed = {r[0] for r in query(db_path, 'SELECT message_id FROM processed_messages')}
+    cursors_after_crash = query(db_path, 'SELECT label_id FROM history_cursors')
+
+    second = spawn(crashed_dir, messages, seed, 0, second_log, interval, resume=True)
+    refetched = set(read_lines(second_log)) & checkpointed
+    covered = checkpointed | set(read_lines(second_log))
+
+    reference_result = json.loads(reference.stdout.strip().splitlines()[-1]) if reference.returncode == 0 else {}
+    resumed_result = json.loads(second.stdout.strip().splitlines()[-1]) if second.returncode == 0 else {}
+    crashed_candidates = query(db_path, 'SELECT COUNT(*), SUM(exported = 0) FROM candidates')[0]
+    final_runs = query(db_path, 'SELECT status FROM scan_runs')
+    final_cursors = query(db_path, 'SELECT label_id FROM history_cursors')
+
+    checks = {
+        'first_attempt_killed': first.returncode == CRASH_EXIT_CODE,
+        'run_left_resumable': runs == [(runs[0][0], 'running')] if runs else False,
+        'checkpoint_recorded_progress': len(checkpointed) > 0,
+        'resumed_same_run': resumed_result.get('resumed') is True and bool(runs)
+                            and resumed_result.get('run_id') == runs[0][0],
+        'no_finished_message_refetched': not refetched,
+        'all_messages_covered': all_ids <= covered,
+        'same_candidates_as_clean_scan': crashed_candidates[0] == reference_result.get('resumes_found'),
+        'all_candidates_exported': (crashed_candidates[1] or 0) == 0,
+        'run_completed': final_runs == [('completed',)],
+        'no_cursor_before_completion': cursors_after_crash == [],
+        'baseline_after_completion': final_cursors == [('',)]
+    }
+    return {
+        'passed': all(checks.values()),
+        'checks': checks,
+        'messages': messages,
+        'crash_after_fetches': crash_after,
+        'checkpointed_before_crash': len(checkpointed),
+        'fetched_before_crash': len(read_lines(first_log)),
+        'fetched_after_resume': len(read_lines(second_log)),
+        'refetched_finished': sorted(refetched)[:10],
+        'clean_scan': reference_result,
+        'resumed_scan': resumed_result,
+        'child_errors': [p.stderr[-2000:] for p in (reference, second) if p.returncode != 0]
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Crash a scan midway and verify it resumes')
+    parser.add_argument('--messages', type=int, default=400)
+    parser.add_argument('--crash-after', type=int, default=150, help='message fetches before the kill')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--checkpoint-interval', type=float, default=0.2)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--fetch-log', help=argparse.SUPPRESS)
+    parser.add_argument('--resume', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.data_dir, args.messages, args.seed, args.crash_after, args.fetch_log,
+                                   args.resume)))
+        return 0
+
+    report = run_check(args.messages, args.crash_after, args.seed, args.checkpoint_interval)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Boolean skill filter benchmark on a large synthetic candidate set
+
+The last query repeats the first with a received-date and an experience
+range. At 1M candidates the term-only queries run in about 0.1-0.2 ms
+(p50), the ranged one in about 3 ms: range predicates are bit-sliced
+comparisons over the whole id space, not lookups.
+
+Usage:
+    python -m bench.filter_bench --candidates 1000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+from bench.scan_bench import git_commit, percentile, peak_rss_mb
+from skill_index import SkillIndex
+
+DEFAULT_QUERIES = [
+    'UVM AND SystemVerilog AND NOT fresher AND (Cadence OR Synopsys)',
+    'STA AND PrimeTime',
+    '"Physical Design" AND NOT Innovus',
+    'DFT OR ATPG OR MBIST',
+    'Verilog'
+]
+
+
+def build_index(count: int, seed: int) -> SkillIndex:
+    from app import VLSI_SKILLS
+
+    rng = random.Random(seed)
+    catalogue = [(category, skill) for category, skills in VLSI_SKILLS.items() for skill in skills]
+    start = date(2023, 1, 1)
+    index = SkillIndex()
+    for candidate_id in range(1, count + 1):
+        skills = {}
+        for category, skill in rng.sample(catalogue, rng.randint(3, 12)):
+            skills.setdefault(category, []).append(skill)
+        years = rng.choice([0, 0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15])
+        index.add(candidate_id, skills, years, start + timedelta(days=rng.randrange(730)), fresher=years == 0)
+    return index
+
+
+def time_query(index: SkillIndex, query: str, repeat: int, **ranges) -> dict:
+    index.filter(query, **ranges)  # materialise bitmaps before timing
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = index.filter(query, **ranges)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {
+        'query': query,
+        'ranges': {k: str(v) for k, v in ranges.items()},
+        'matches': result['count'],
+        'p50_us': round(percentile(samples, 50), 1),
+        'p99_us': round(percentile(samples, 99), 1)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Skill bitmap filter benchmark')
+    parser.add_argument('--candidates', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    # Keep benchmark state out of the app's real data directory
+    os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='vlsi-filter-'))
+    logging.disable(logging.WARNING)
+    started = time.perf_counter()
+    index = build_index(args.candidates, args.seed)
+    build_seconds = time.perf_counter() - started
+
+    results = [time_query(index, q, args.repeat) for q in DEFAULT_QUERIES]
+    results.append(time_query(index, DEFAULT_QUERIES[0], args.repeat,
+                              received_from=date(2023, 6, 1), received_to=date(2024, 5, 31),
+                              min_experience=3, max_experience=10))
+
+    report = {
+        'benchmark': 'filter',
+        'git_commit': git_commit(),
+        'config': {'candidates': args.candidates, 'repeat': args.repeat, 'seed': args.seed},
+        'results': {
+            'build_seconds': round(build_seconds, 2),
+            'terms': len(index.terms),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'queries': results
+        }
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Scanner startup to first served search, with and without the index snapshot
+
+For each corpus size a scan database is filled with synthetic candidates,
+then the scanner is constructed twice: once rebuilding the search index
+from SQLite (no snapshot yet) and once mapping the snapshot that the first
+construction wrote. Each timing runs until the first filter query returns.
+
+Usage:
+    python -m bench.index_startup_bench --sizes 10000,100000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+from bench.memory_bench import generate_candidates
+from bench.scan_bench import git_commit
+
+QUERY = 'UVM AND SystemVerilog AND NOT fresher'
+
+
+def fill_store(store, count: int, seed: int):
+    from scan_store import CANDIDATE_COLUMNS
+
+    rows = []
+    for candidate in generate_candidates(count, seed):
+        candidate = dict(candidate, skills=json.dumps(candidate['skills']), fresher=int(candidate['fresher']))
+        rows.append(tuple(candidate.get(c) for c in CANDIDATE_COLUMNS))
+    placeholders = ', '.join('?' for _ in CANDIDATE_COLUMNS)
+    store._conn.executemany(
+        f"INSERT INTO candidates ({', '.join(CANDIDATE_COLUMNS)}) VALUES ({placeholders})", rows)
+
+
+def time_to_first_search(scanner_app, store) -> tuple:
+    started = time.perf_counter()
+    scanner = scanner_app.VLSIResumeScanner(store=store)
+    result = scanner.filter_candidates(QUERY, limit=10)
+    return time.perf_counter() - started, scanner, result
+
+
+def run_size(count: int, seed: int) -> dict:
+    import app as scanner_app
+    from scan_store import ScanStore
+
+    work = tempfile.mkdtemp(prefix='vlsi-index-')
+    scanner_app.SEARCH_INDEX_PATH = os.path.join(work, 'search.idx')
+    store = ScanStore(os.path.join(work, 'scanner.db'))
+    fill_store(store, count, seed)
+
+    rebuild_seconds, scanner, cold = time_to_first_search(scanner_app, store)
+    scanner.save_search_snapshot()
+    mapped_seconds, scanner, warm = time_to_first_search(scanner_app, store)
+    assert cold['total'] == warm['total'] and cold['candidates'] == warm['candidates']
+
+    return {
+        'candidates': count,
+        'snapshot_mb': round(os.path.getsize(scanner_app.SEARCH_INDEX_PATH) / 1e6, 1),
+        'rebuild_to_first_search_ms': round(rebuild_seconds * 1000, 1),
+        'snapshot_to_first_search_ms': round(mapped_seconds * 1000, 1),
+        'matches': warm['total']
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Search index startup benchmark')
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    # Keep benchmark state out of the app's real data directory
+    os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='vlsi-index-'))
+    logging.disable(logging.WARNING)
+    results = [run_size(int(size), args.seed) for size in args.sizes.split(',')]
+    report = {
+        'benchmark': 'index_startup',
+        'git_commit': git_commit(),
+        'config': {'sizes': args.sizes, 'seed': args.seed, 'query': QUERY},
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
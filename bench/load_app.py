@@ -0,0 +1,23 @@
+"""WSGI entry point serving the app against fake Google services
+
+Used by bench.load_test so gunicorn can be load-tested without a Google
+project. Each gunicorn worker imports this module and gets its own
+synthetic mailbox and fakes, authenticated as if OAuth had completed.
+
+    LOAD_MAILBOX_SIZE=200 LOAD_LATENCY_MS=10 gunicorn bench.load_app:app
+"""
+import os
+
+from bench.fake_google import install_fakes
+from bench.synthetic import generate_mailbox
+
+import app as scanner_app
+
+LOAD_MAILBOX_SIZE = int(os.environ.get('LOAD_MAILBOX_SIZE', 200))
+LOAD_LATENCY_MS = float(os.environ.get('LOAD_LATENCY_MS', 10))
+LOAD_SEED = int(os.environ.get('LOAD_SEED', 42))
+
+install_fakes(scanner_app.scanner, generate_mailbox(LOAD_MAILBOX_SIZE, seed=LOAD_SEED),
+              LOAD_LATENCY_MS, quota_scale=0, seed=LOAD_SEED)
+
+app = scanner_app.app
@@ -0,0 +1,338 @@
+"""HTTP load test with latency SLO checks
+
+Starts the app under gunicorn against fake Google services (bench.load_app)
+for each workers x threads configuration, drives a closed-loop mix of
+dashboard loads, health checks, status polls and scan submissions from
+concurrent virtual users, and reports throughput and p50/p95/p99 latency
+per route. Scan submissions return at once, but the scans they queue run
+on background threads of the same process and compete for its CPU.
+
+By default only the deployed configuration, read from the Procfile, is
+tested; the run fails with exit status 1 if the first configuration
+misses any SLO. The report recommends the configuration with the best
+throughput that meets every SLO, preferring fewer workers when throughput
+is within 10%, since the scan scheduler, push coalescer and search index
+live per process.
+
+Usage:
+    python -m bench.load_test --configs 1x2,1x4,1x8,2x4 --users 16 --duration 20
+    python -m bench.load_test --url http://localhost:5000 --slo /api/status:p95=200
+
+Findings behind the Procfile (16 users, default mix and SLOs, 10 ms fake
+API latency, no recycling):
+
+- 1x2 575 req/s, 1x4 555, 1x8 563, 2x4 514; all met every SLO. Once scan
+  submissions stopped holding request threads, extra threads only added
+  contention, so the Procfile keeps 1 worker with 2 threads.
+- Each worker restart stalls requests for about 3 s while the new worker
+  imports the app. At load-test rates --max-requests 1000 restarts every
+  couple of seconds; at dashboard traffic it is hours apart, so recycling
+  stays as a leak guard with --max-requests-jitter 100 so several workers
+  never restart together.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+
+from bench.scan_bench import git_commit, percentile
+from pipeline import parse_stage_config
+
+ROUTES = {
+    '/': ('GET', None),
+    '/health': ('GET', None),
+    '/api/status': ('GET', None),
+    '/api/scan-emails': ('POST', b'{}')
+}
+DEFAULT_MIX = '/=0.15,/health=0.3,/api/status=0.5,/api/scan-emails=0.05'
+DEFAULT_SLOS = '/health:p95=100,/api/status:p95=300,/:p95=500,/api/scan-emails:p95=300'
+PROCFILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Procfile')
+OK_STATUSES = (200, 202)
+REQUEST_TIMEOUT = 60
+
+
+def parse_slos(spec: str) -> dict:
+    """Parse '/health:p95=100,/:p99=500' into {'/health': {'p95': 100.0}, '/': {'p99': 500.0}}"""
+    slos = {}
+    for key, limit in parse_stage_config(spec, float).items():
+        route, _, stat = key.rpartition(':')
+        if route not in ROUTES or stat not in ('p50', 'p95', 'p99'):
+            raise ValueError(f"Bad SLO {key}: expected <route>:<p50|p95|p99>=<ms>")
+        slos.setdefault(route, {})[stat] = limit
+    return slos
+
+
+def parse_configs(spec: str) -> list:
+    """Parse '1x2,2x4' into [(1, 2), (2, 4)]"""
+    configs = []
+    for item in spec.split(','):
+        workers, _, threads = item.strip().partition('x')
+        configs.append((int(workers), int(threads)))
+    return configs
+
+
+def procfile_settings() -> dict:
+    """gunicorn --workers/--threads/--max-requests(-jitter) of the deployed web process"""
+    settings = {'workers': 1, 'threads': 1, 'max-requests': 0, 'max-requests-jitter': 0}
+    try:
+        with open(PROCFILE) as f:
+            command = next((line.split(':', 1)[1] for line in f if line.startswith('web:')), '')
+    except FileNotFoundError:
+        return settings
+    args = command.split()
+    for flag in settings:
+        if f"--{flag}" in args[:-1]:
+            settings[flag] = int(args[args.index(f"--{flag}") + 1])
+    return settings
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class GunicornServer:
+    """The app under gunicorn with the Procfile flags and fake Google services"""
+
+    def __init__(self, workers: int, threads: int, max_requests: int, max_requests_jitter: int, mailbox: int,
+                 latency_ms: float, admin_password: str):
+        self.workers = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.work_dir = tempfile.mkdtemp(prefix='vlsi-load-')
+        self.env = dict(os.environ, DATA_DIR=self.work_dir, ADMIN_PASSWORD=admin_password,
+                        LOAD_MAILBOX_SIZE=str(mailbox), LOAD_LATENCY_MS=str(latency_ms))
+        self.process = None
+
+    @property
+    def command(self) -> list:
+        return ['gunicorn', '--bind', f"127.0.0.1:{self.port}", '--timeout', '300', '--workers', str(self.workers),
+                '--threads', str(self.threads), '--max-requests', str(self.max_requests),
+                '--max-requests-jitter', str(self.max_requests_jitter), 'bench.load_app:app']
+
+    def start(self, timeout: float = 90.0):
+        log = open(os.path.join(self.work_dir, 'server.log'), 'wb')
+        self.process = subprocess.Popen([sys.executable, '-m', *self.command], env=self.env,
+                                        stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.process.returncode}, see {log.name}")
+            try:
+                with urllib.request.urlopen(self.url + '/health', timeout=2) as response:
+                    if response.status == 200:
+                        return
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.25)
+        self.stop()
+        raise RuntimeError(f"gunicorn did not become healthy within {timeout:.0f}s, see {log.name}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class VirtualUser(threading.Thread):
+    """Closed loop: pick a route from the mix, request it, record the latency, repeat"""
+
+    def __init__(self, base_url: str, mix: dict, admin_password: str, record_after: float, stop_at: float,
+                 seed: int):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.routes, self.weights = zip(*mix.items())
+        self.admin_password = admin_password
+        self.record_after = record_after
+        self.stop_at = stop_at
+        self.rng = random.Random(seed)
+        self.samples = {route: [] for route in self.routes}
+        self.errors = {route: 0 for route in self.routes}
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def login(self):
+        body = json.dumps({'password': self.admin_password}).encode('utf-8')
+        self.request('POST', '/api/auth', body)
+
+    def request(self, method: str, route: str, body: bytes = None) -> int:
+        req = urllib.request.Request(self.base_url + route, data=body, method=method,
+                                     headers={'Content-Type': 'application/json'} if body is not None else {})
+        try:
+            with self.opener.open(req, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            return 0
+
+    def run(self):
+        self.login()
+        while time.monotonic() < self.stop_at:
+            route = self.rng.choices(self.routes, self.weights)[0]
+            method, body = ROUTES[route]
+            started = time.monotonic()
+            status = self.request(method, route, body)
+            if started < self.record_after:
+                continue
+            self.samples[route].append((time.monotonic() - started) * 1000.0)
+            if status not in OK_STATUSES:
+                self.errors[route] += 1
+
+
+def drive_load(base_url: str, mix: dict, users: int, duration: float, warmup: float, admin_password: str,
+               seed: int) -> dict:
+    """Run `users` virtual users for warmup + duration seconds; returns per-route results"""
+    now = time.monotonic()
+    record_after = now + warmup
+    stop_at = record_after + duration
+    crew = [VirtualUser(base_url, mix, admin_password, record_after, stop_at, seed + i) for i in range(users)]
+    for user in crew:
+        user.start()
+    for user in crew:
+        # Requests still in flight at stop_at finish and are counted
+        user.join(stop_at - time.monotonic() + REQUEST_TIMEOUT)
+    elapsed = max(time.monotonic(), stop_at) - record_after
+
+    routes = {}
+    for route in mix:
+        latencies = [ms for user in crew for ms in user.samples[route]]
+        errors = sum(user.errors[route] for user in crew)
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'max_ms': round(max(latencies), 1) if latencies else 0.0
+        }
+    requests = sum(r['requests'] for r in routes.values())
+    errors = sum(r['errors'] for r in routes.values())
+    return {
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(requests / elapsed, 2),
+        'error_rate': round(errors / requests, 4) if requests else 0.0,
+        'routes': routes
+    }
+
+
+def check_slos(result: dict, slos: dict, max_error_rate: float) -> list:
+    """Human-readable SLO violations of one run (empty when all are met)"""
+    violations = []
+    for route, limits in slos.items():
+        measured = result['routes'].get(route)
+        if not measured or not measured['requests']:
+            continue
+        for stat, limit in limits.items():
+            if measured[f"{stat}_ms"] > limit:
+                violations.append(f"{route} {stat} {measured[f'{stat}_ms']:.0f} ms > {limit:.0f} ms")
+    if result['error_rate'] > max_error_rate:
+        violations.append(f"error rate {result['error_rate']:.2%} > {max_error_rate:.2%}")
+    return violations
+
+
+def recommend(runs: list, max_requests: int, max_requests_jitter: int):
+    """Best throughput among runs that met every SLO, preferring fewer workers within 10%"""
+    passing = [run for run in runs if not run['slo_violations'] and 'workers' in run]
+    if not passing:
+        return None
+    best = max(run['results']['throughput_rps'] for run in passing)
+    close = [run for run in passing if run['results']['throughput_rps'] >= 0.9 * best]
+    choice = min(close, key=lambda run: (run['workers'], run['threads'], -run['results']['throughput_rps']))
+    return {
+        'workers': choice['workers'],
+        'threads': choice['threads'],
+        'throughput_rps': choice['results']['throughput_rps'],
+        'procfile': (f"web: gunicorn --bind 0.0.0.0:$PORT --timeout 300 --workers {choice['workers']} "
+                     f"--threads {choice['threads']} --max-requests {max_requests}"
+                     + (f" --max-requests-jitter {max_requests_jitter}" if max_requests_jitter else '') + " app:app")
+    }
+
+
+def main(argv=None) -> int:
+    deployed = procfile_settings()
+    parser = argparse.ArgumentParser(description='HTTP load test with latency SLO checks')
+    parser.add_argument('--url', help='test an already running app instead of starting gunicorn')
+    parser.add_argument('--configs', default=f"{deployed['workers']}x{deployed['threads']}",
+                        help='gunicorn workers x threads to sweep, the Procfile one by default')
+    parser.add_argument('--max-requests', type=int, default=deployed['max-requests'],
+                        help='gunicorn worker recycling, the Procfile value by default (0 disables)')
+    parser.add_argument('--max-requests-jitter', type=int, default=deployed['max-requests-jitter'],
+                        help='random extra requests before recycling, the Procfile value by default')
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds per configuration')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds before each run')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='route weights, e.g. /health=0.5,/api/status=0.5')
+    parser.add_argument('--slo', default=DEFAULT_SLOS, help='latency limits, e.g. /api/status:p95=300')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--mailbox', type=int, default=200, help='synthetic messages behind each worker')
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='mean fake Google API latency')
+    parser.add_argument('--admin-password', default=os.environ.get('ADMIN_PASSWORD', 'admin123'))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    mix = parse_stage_config(args.mix, float)
+    unknown = set(mix) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes in --mix: {', '.join(sorted(unknown))}")
+    slos = parse_slos(args.slo)
+
+    runs = []
+    if args.url:
+        result = drive_load(args.url.rstrip('/'), mix, args.users, args.duration, args.warmup,
+                            args.admin_password, args.seed)
+        runs.append({'url': args.url, 'results': result, 'slo_violations': check_slos(result, slos,
+                                                                                      args.max_error_rate)})
+    else:
+        for workers, threads in parse_configs(args.configs):
+            server = GunicornServer(workers, threads, args.max_requests, args.max_requests_jitter, args.mailbox,
+                                    args.latency_ms, args.admin_password)
+            server.start()
+            try:
+                result = drive_load(server.url, mix, args.users, args.duration, args.warmup,
+                                    args.admin_password, args.seed)
+            finally:
+                server.stop()
+            violations = check_slos(result, slos, args.max_error_rate)
+            runs.append({'workers': workers, 'threads': threads, 'results': result, 'slo_violations': violations})
+            print(f"{workers}x{threads}: {result['throughput_rps']} req/s, "
+                  f"{'SLOs met' if not violations else '; '.join(violations)}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'load',
+        'git_commit': git_commit(),
+        'config': {'max_requests': args.max_requests, 'max_requests_jitter': args.max_requests_jitter,
+                   'users': args.users, 'duration': args.duration, 'warmup': args.warmup, 'mix': mix,
+                   'slos': slos, 'max_error_rate': args.max_error_rate, 'mailbox': args.mailbox,
+                   'latency_ms': args.latency_ms, 'seed': args.seed},
+        'results': runs,
+        'recommended': recommend(runs, args.max_requests, args.max_requests_jitter),
+        'passed': not runs[0]['slo_violations']
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
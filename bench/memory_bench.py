@@ -0,0 +1,126 @@
+"""Bytes-per-candidate of the columnar CandidateTable versus plain dicts
+
+Usage:
+    python -m bench.memory_bench --candidates 100000
+"""
+import gc
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bench.scan_bench import git_commit
+from bench.synthetic import FIRST_NAMES, LAST_NAMES
+from candidate_table import CandidateTable
+
+
+def generate_candidates(count: int, seed: int):
+    """Yield candidate dicts shaped like the ones the scan pipeline persists"""
+    from app import VLSI_SKILLS
+
+    rng = random.Random(seed)
+    catalogue = [(category, skill) for category, skills in VLSI_SKILLS.items() for skill in skills]
+    run_ids = [f"run-{i:04d}-{rng.getrandbits(32):08x}" for i in range(max(1, count // 5000))]
+    start = datetime(2024, 1, 1)
+    for candidate_id in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        skills = {}
+        for category, skill in rng.sample(catalogue, rng.randint(3, 12)):
+            skills.setdefault(category, []).append(skill)
+        received = start + timedelta(minutes=rng.randrange(500000))
+        years = float(rng.randint(0, 15))
+        yield {
+            'id': candidate_id,
+            'content_hash': f"{rng.getrandbits(160):040x}",
+            'run_id': rng.choice(run_ids),
+            'message_id': f"{rng.getrandbits(64):016x}",
+            'name': f"{first} {last}",
+            'email': f"{first.lower()}.{last.lower()}{candidate_id}@example.com",
+            'phone': f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}",
+            'experience_years': years,
+            'fresher': years == 0,
+            'skills': skills,
+            'skill_count': sum(len(s) for s in skills.values()),
+            'sender': f"{first} {last} <{first.lower()}{candidate_id}@example.com>",
+            'subject': rng.choice(['Resume', 'Application for VLSI role', 'CV attached']),
+            'received': received.strftime('%a, %d %b %Y %H:%M:%S +0000'),
+            'filename': rng.choice(['resume.pdf', 'resume.docx', f"{first}_{last}_CV.pdf"]),
+            'drive_file_id': f"1{rng.getrandbits(190):048x}"[:33],
+            'created_at': received.isoformat()
+        }
+
+
+def measure(build) -> tuple:
+    """Bytes still allocated after `build()` returns, plus the built object"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, built
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Candidate memory footprint benchmark')
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+    count = args.candidates
+
+    # Keep benchmark state out of the app's real data directory, and import
+    # the app before tracing starts
+    os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='vlsi-memory-'))
+    logging.disable(logging.WARNING)
+    import app  # noqa: F401
+
+    dict_bytes, dict_seconds, dicts = measure(lambda: list(generate_candidates(count, args.seed)))
+    del dicts
+
+    def build_table():
+        table = CandidateTable()
+        for candidate in generate_candidates(count, args.seed):
+            table.add(candidate)
+        return table
+
+    table_bytes, table_seconds, table = measure(build_table)
+    sample = random.Random(args.seed).sample(range(1, count + 1), min(count, 1000))
+    started = time.perf_counter()
+    table.get_many(sample)
+    lookup_us = (time.perf_counter() - started) * 1e6 / len(sample)
+
+    report = {
+        'benchmark': 'candidate_memory',
+        'git_commit': git_commit(),
+        'config': {'candidates': count, 'seed': args.seed},
+        'results': {
+            'dict_bytes_per_candidate': round(dict_bytes / count),
+            'table_bytes_per_candidate': round(table_bytes / count),
+            'table_column_bytes_per_candidate': round(table.nbytes() / count),
+            'reduction': round(dict_bytes / max(1, table_bytes), 2),
+            'interned_skills': len(table.skills),
+            'interned_runs': len(table.runs),
+            'dict_build_seconds': round(dict_seconds, 2),
+            'table_build_seconds': round(table_seconds, 2),
+            'materialise_microseconds': round(lookup_us, 1)
+        }
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Local stand-in for the Pub/Sub push publisher
+
+Posts Gmail watch notifications to the webhook the same way Pub/Sub does,
+so push ingestion can be exercised without a Google Cloud project.
+
+Usage:
+    # Publish a burst of notifications to a running app
+    python -m bench.push_publisher --url http://localhost:5000/api/gmail/push \\
+        --email recruiter@example.com --history-id 1234 --burst 20
+
+    # Self-contained demo: app + fake Gmail in-process, new mail, burst, report
+    python -m bench.push_publisher --demo --new-messages 25 --burst 25
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import urllib.request
+from datetime import datetime
+
+from push_ingest import build_push_envelope
+
+
+def publish(url: str, email_address: str, history_id: int, message_id: str = '1', token: str = None) -> int:
+    """POST one push envelope and return the HTTP status"""
+    if token:
+        url += ('&' if '?' in url else '?') + 'token=' + token
+    body = json.dumps(build_push_envelope(email_address, history_id, message_id)).encode('utf-8')
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.status
+
+
+def publish_burst(url: str, email_address: str, history_ids: list, token: str = None) -> list:
+    return [publish(url, email_address, hid, str(i), token) for i, hid in enumerate(history_ids)]
+
+
+def run_demo(new_messages: int, burst: int, window: float, seed: int) -> dict:
+    """Start the app with fake Gmail, deliver new mail and push-notify it"""
+    os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='vlsi-push-'))
+    # The push endpoint refuses notifications unless a verification token is configured
+    os.environ.setdefault('PUBSUB_VERIFICATION_TOKEN', 'local-demo')
+    from werkzeug.serving import make_server
+    from bench.synthetic import build_message, generate_mailbox
+    from bench.fake_google import install_fakes
+    import app as scanner_app
+
+    mailbox = generate_mailbox(20, seed=seed)
+    services = install_fakes(scanner_app.scanner, mailbox, quota_scale=0, seed=seed)
+    scanner_app.push_coalescer.window_seconds = window
+    scanner_app.scanner.scan_emails()
+    calls_before = services['gmail'].backend.calls['messages.get']
+
+    server = make_server('127.0.0.1', 0, scanner_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/gmail/push"
+
+    rng = random.Random(seed + 1)
+    history_ids = []
+    for index in range(new_messages):
+        message, attachments = build_message(rng, 100000 + index, 'pdf', [], 0.0, datetime.now())
+        services['gmail'].deliver(message, attachments)
+        history_ids.append(mailbox.history_id)
+
+    started = time.perf_counter()
+    # Pub/Sub delivers notifications in bursts, spread evenly across the new history ids
+    step = max(1, len(history_ids) // max(1, burst))
+    statuses = publish_burst(url, mailbox.email_address, (history_ids[::step] + history_ids[-1:])[:burst],
+                             token=scanner_app.PUBSUB_VERIFICATION_TOKEN)
+    scanner_app.push_coalescer.wait_idle(timeout=60)
+    # The coalescer only hands the push to the scheduler, which runs the scan in the background
+    scanner_app.scan_scheduler.wait_idle(timeout=60)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    return {
+        'http_statuses': sorted(set(statuses)),
+        'notifications_sent': len(statuses),
+        'seconds_to_ingest': round(elapsed, 3),
+        'messages_fetched_by_push': services['gmail'].backend.calls['messages.get'] - calls_before,
+        'push': scanner_app.push_coalescer.stats,
+        'stats': scanner_app.scanner.stats
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Publish Gmail push notifications locally')
+    parser.add_argument('--url', default='http://localhost:5000/api/gmail/push')
+    parser.add_argument('--email', default='recruiter@example.com')
+    parser.add_argument('--history-id', type=int, default=None)
+    parser.add_argument('--burst', type=int, default=1, help='notifications to send back to back')
+    parser.add_argument('--token', help='PUBSUB_VERIFICATION_TOKEN configured on the app')
+    parser.add_argument('--demo', action='store_true', help='run an in-process end-to-end demo')
+    parser.add_argument('--new-messages', type=int, default=10, help='messages delivered in --demo')
+    parser.add_argument('--window', type=float, default=0.5, help='coalescing window for --demo')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if args.demo:
+        logging.disable(logging.WARNING)
+        print(json.dumps(run_demo(args.new_messages, args.burst, args.window, args.seed), indent=2))
+        return 0
+
+    if args.history_id is None:
+        parser.error('--history-id is required unless --demo is used')
+    statuses = publish_burst(args.url, args.email, [args.history_id + i for i in range(args.burst)], args.token)
+    print(json.dumps({'sent': len(statuses), 'statuses': statuses}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""End-to-end scan benchmark against a synthetic mailbox
+
+Usage:
+    python -m bench.scan_bench --messages 500 --latency-ms 20 --output scan.json
+    python -m bench.scan_bench --messages 500 --baseline scan.json
+
+Results are JSON tagged with the git commit and full configuration, so
+runs with the same seed and flags are comparable across commits.
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+from bench.synthetic import DEFAULT_MIX, generate_mailbox, parse_mix
+from bench.fake_google import install_fakes
+from pipeline import parse_stage_config
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100.0) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def run_scan_benchmark(messages: int, attachment_mix: dict, duplicate_rate: float,
+                       latency_ms: float, quota_scale: float, seed: int, workers: dict = None) -> dict:
+    """Generate a mailbox, scan it through the fakes and collect metrics"""
+    # Keep benchmark state out of the app's real data directory
+    data_dir = tempfile.mkdtemp(prefix='vlsi-bench-')
+    os.environ.setdefault('DATA_DIR', data_dir)
+    import app as scanner_app
+    from scan_store import ScanStore
+
+    generate_start = time.perf_counter()
+    mailbox = generate_mailbox(messages, attachment_mix, duplicate_rate, seed)
+    generate_seconds = time.perf_counter() - generate_start
+
+    scanner = scanner_app.VLSIResumeScanner(store=ScanStore(os.path.join(data_dir, 'scan.db')))
+    services = install_fakes(scanner, mailbox, latency_ms, quota_scale, seed)
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    result = scanner.scan_emails(workers=workers)
+    wall_seconds = time.perf_counter() - started
+    # Per-resume latency from being listed to being persisted
+    latencies = scanner.last_scan_latencies
+
+    return {
+        'scan': result,
+        'generate_seconds': round(generate_seconds, 3),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_msgs_per_sec': round(result.get('emails_scanned', 0) / wall_seconds, 2) if wall_seconds else 0.0,
+        # Not 'latency_ms': reports before the staged pipeline measured per-message processing time there
+        'resume_latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'max': round(max(latencies), 3) if latencies else 0.0
+        },
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_before_scan_mb': round(rss_before, 1),
+        'stats': dict(scanner.stats),
+        'api_calls': {name: dict(service.backend.calls) for name, service in services.items()},
+        'quota_throttled_seconds': {
+            name: round(service.backend.quota.throttled_seconds, 3) for name, service in services.items()
+        }
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Percent change of headline metrics against a previous run
+
+    Latency percentiles are only compared when both reports measured the
+    same thing; a baseline with the older per-message `latency_ms` gets None.
+    """
+    def delta(new, old):
+        return round((new - old) / old * 100.0, 1) if old and new is not None else None
+
+    cur, base = current['results'], baseline['results']
+    base_latency = base.get('resume_latency_ms', {})
+    return {
+        'baseline_commit': baseline.get('git_commit'),
+        'throughput_pct': delta(cur['throughput_msgs_per_sec'], base['throughput_msgs_per_sec']),
+        'p50_pct': delta(cur['resume_latency_ms']['p50'], base_latency.get('p50')),
+        'p99_pct': delta(cur['resume_latency_ms']['p99'], base_latency.get('p99')),
+        'peak_rss_pct': delta(cur['peak_rss_mb'], base['peak_rss_mb'])
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Offline VLSI scanner benchmark')
+    parser.add_argument('--messages', type=int, default=500, help='number of synthetic emails')
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help='attachment mix, e.g. pdf=0.5,docx=0.3,image=0.1,none=0.1')
+    parser.add_argument('--duplicate-rate', type=float, default=0.1,
+                        help='probability that a resume attachment repeats an earlier one')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='mean fake API latency per call')
+    parser.add_argument('--quota-scale', type=float, default=1.0,
+                        help='multiplier on Google quotas (0 disables quota throttling)')
+    parser.add_argument('--workers', default='', help='per-stage worker counts, e.g. download=8,extract=2')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--baseline', help='previous JSON results to compare against')
+    parser.add_argument('--verbose', action='store_true', help='keep scanner logs on stdout')
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    config = {
+        'messages': args.messages,
+        'attachment_mix': parse_mix(args.mix),
+        'duplicate_rate': args.duplicate_rate,
+        'latency_ms': args.latency_ms,
+        'quota_scale': args.quota_scale,
+        'seed': args.seed,
+        'workers': parse_stage_config(args.workers)
+    }
+    report = {
+        'benchmark': 'scan',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': run_scan_benchmark(**config)
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
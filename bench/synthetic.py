@@ -0,0 +1,385 @@
+"""Synthetic mailbox and resume generator for offline benchmarks"""
+import io
+import html
+import base64
+import random
+import struct
+import hashlib
+import zipfile
+from email.message import EmailMessage
+from datetime import datetime, timedelta
+
+try:
+    from docx import Document
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Ananya', 'Karthik', 'Divya',
+               'Arjun', 'Meera', 'Rohan', 'Kavya', 'Siddharth', 'Nisha', 'Aditya', 'Pooja']
+LAST_NAMES = ['Sharma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Gupta', 'Menon', 'Rao',
+              'Kumar', 'Joshi', 'Pillai', 'Das', 'Bhat', 'Verma', 'Shetty', 'Kulkarni']
+COMPANIES = ['Intel', 'Qualcomm', 'NVIDIA', 'AMD', 'Broadcom', 'Texas Instruments',
+             'MediaTek', 'Samsung Semiconductor', 'Marvell', 'Synopsys', 'Cadence']
+SKILL_POOL = ['UVM', 'SystemVerilog', 'Verilog', 'VHDL', 'RTL Design', 'STA', 'PrimeTime',
+              'Innovus', 'DFT', 'ATPG', 'MBIST', 'Cadence', 'Synopsys', 'AXI', 'PCIe',
+              'DDR', 'Perl', 'Python', 'TCL', 'Formal Verification', 'CDC', 'FPGA',
+              'Floorplanning', 'CTS', 'Virtuoso', 'Calibre', 'LVS', 'DRC']
+FILLER = ['Responsible for block level ownership from spec to signoff.',
+          'Worked closely with architecture and software teams.',
+          'Mentored junior engineers and reviewed test plans.',
+          'Automated regression triage and coverage closure flows.',
+          'Drove tapeout of multiple SoCs in advanced nodes.']
+
+FIXED_TIMESTAMP = datetime(2024, 1, 1)
+
+DEFAULT_MIX = {'pdf': 0.5, 'docx': 0.3, 'image': 0.1, 'none': 0.1}
+
+# Attachments the scanner should reject before parsing; opt in via --mix
+JUNK_KINDS = ('scanned', 'encrypted', 'doc')
+# Owner-password-only PDFs: encrypted, yet they open without a password and must be parsed; opt in via --mix
+PROTECTED_KINDS = ('owner_locked',)
+# Containers holding several resumes (agency ZIPs, forwarded .eml); opt in via --mix
+BATCH_KINDS = ('zip', 'eml')
+# Resume pasted into the message body (text/plain plus text/html alternative), or a long newsletter
+# mentioning a few skills that must not become a candidate; opt in via --mix
+BODY_KINDS = ('inline', 'newsletter')
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse an attachment mix like 'pdf=0.5,docx=0.3,image=0.1,none=0.1'"""
+    mix = {}
+    for item in spec.split(','):
+        kind, _, weight = item.partition('=')
+        mix[kind.strip()] = float(weight)
+    unknown = set(mix) - set(DEFAULT_MIX) - set(JUNK_KINDS) - set(PROTECTED_KINDS) - set(BATCH_KINDS) - set(BODY_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown attachment kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def resume_lines(rng: random.Random) -> list:
+    """Generate the text lines of one plausible VLSI resume"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    years = rng.randint(0, 15)
+    skills = rng.sample(SKILL_POOL, rng.randint(4, 10))
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}{rng.randint(1, 999)}@example.com",
+        f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}",
+        'Summary',
+        'Fresher with strong academic projects' if years == 0 else f"{years} years of experience in VLSI",
+        'Skills',
+        ', '.join(skills),
+        'Experience'
+    ]
+    for company in rng.sample(COMPANIES, min(3, max(1, years // 4))):
+        lines.append(f"{company} - {rng.choice(['Design', 'Verification', 'Physical Design'])} Engineer")
+        lines.extend(rng.sample(FILLER, 2))
+    return lines
+
+
+def render_pdf(lines: list, seal=None, trailer: bytes = b'') -> bytes:
+    """Render text lines into a minimal single-page PDF
+
+    `seal(object_number, data)` encrypts the content stream, for PDFs whose
+    `trailer` entries reference an encryption dictionary.
+    """
+    def escape(text):
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    content = 'BT /F1 11 Tf 50 760 Td 14 TL\n'
+    content += ''.join(f"({escape(line)}) Tj T*\n" for line in lines)
+    content += 'ET'
+    stream = content.encode('latin-1', 'replace')
+    if seal:
+        stream = seal(5, stream)
+
+    return _pdf_document([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+    ], trailer)
+
+
+def render_scanned_pdf(rng: random.Random) -> bytes:
+    """A single-page PDF holding only a raster image, like a scanned resume"""
+    pixels = rng.randbytes(rng.randint(4000, 20000))
+    draw = b'q 612 0 0 792 0 0 cm /Im1 Do Q'
+    return _pdf_document([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /XObject << /Im1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /XObject /Subtype /Image /Width 100 /Height 100 /ColorSpace /DeviceGray '
+        b'/BitsPerComponent 8 /Length %d >>\nstream\n' % len(pixels) + pixels + b'\nendstream',
+        b'<< /Length %d >>\nstream\n' % len(draw) + draw + b'\nendstream'
+    ])
+
+
+# Padding string of the PDF standard security handler
+_PASSWORD_PAD = bytes.fromhex('28bf4e5e4e758a4164004e56fffa01082e2e00b6d0683e802f0ca9fe6453697a')
+# Printing, modifying and copying not allowed
+_RESTRICTED_PERMISSIONS = -64
+
+
+def _rc4(key: bytes, data: bytes) -> bytes:
+    state = list(range(256))
+    j = 0
+    for i in range(256):
+        j = (j + state[i] + key[i % len(key)]) % 256
+        state[i], state[j] = state[j], state[i]
+    out = bytearray()
+    i = j = 0
+    for byte in data:
+        i = (i + 1) % 256
+        j = (j + state[i]) % 256
+        state[i], state[j] = state[j], state[i]
+        out.append(byte ^ state[(state[i] + state[j]) % 256])
+    return bytes(out)
+
+
+def render_encrypted_pdf(lines: list, user_password: str = 'secret') -> bytes:
+    """A text PDF under the 40-bit RC4 standard security handler
+
+    With a user password it cannot be opened without it; with an empty one
+    only the owner password is set and any reader opens it. The file id is
+    derived from the text so the output stays deterministic.
+    """
+    def padded(password):
+        return (password.encode('latin-1') + _PASSWORD_PAD)[:32]
+
+    file_id = hashlib.md5('\n'.join(lines).encode('utf-8')).digest()
+    owner = _rc4(hashlib.md5(padded('owner')).digest()[:5], padded(user_password))
+    key = hashlib.md5(padded(user_password) + owner + struct.pack('<i', _RESTRICTED_PERMISSIONS)
+                      + file_id).digest()[:5]
+
+    def seal(object_number, data):
+        object_key = hashlib.md5(key + struct.pack('<I', object_number)[:3] + b'\x00\x00').digest()[:10]
+        return _rc4(object_key, data)
+
+    trailer = (b'/Encrypt << /Filter /Standard /V 1 /R 2 /O <%s> /U <%s> /P %d >> /ID [<%s> <%s>]'
+               % (owner.hex().encode(), _rc4(key, _PASSWORD_PAD).hex().encode(), _RESTRICTED_PERMISSIONS,
+                  file_id.hex().encode(), file_id.hex().encode()))
+    return render_pdf(lines, seal, trailer)
+
+
+def _pdf_document(objects: list, trailer: bytes = b'') -> bytes:
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R %s>>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, trailer + b' ' if trailer else b'', xref)
+    return bytes(out)
+
+
+def render_docx(lines: list) -> bytes:
+    """Render text lines into a DOCX document"""
+    document = Document()
+    # Fixed metadata keeps the bytes (and content hash) identical across runs
+    document.core_properties.created = FIXED_TIMESTAMP
+    document.core_properties.modified = FIXED_TIMESTAMP
+    document.core_properties.last_modified_by = 'bench'
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    # Re-pack with fixed zip entry timestamps
+    normalized = io.BytesIO()
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(normalized, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            entry = zipfile.ZipInfo(info.filename, FIXED_TIMESTAMP.timetuple()[:6])
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            target.writestr(entry, source.read(info))
+    return normalized.getvalue()
+
+
+def render_resume(rng: random.Random) -> tuple:
+    """(extension, bytes) of one fresh resume, DOCX or PDF"""
+    if DOCX_AVAILABLE and rng.random() < 0.5:
+        return 'docx', render_docx(resume_lines(rng))
+    return 'pdf', render_pdf(resume_lines(rng))
+
+
+def render_agency_zip(rng: random.Random) -> bytes:
+    """An agency batch: a ZIP of several resumes in a folder"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for number in range(rng.randint(3, 8)):
+            extension, data = render_resume(rng)
+            entry = zipfile.ZipInfo(f"candidates/candidate_{number + 1}.{extension}", FIXED_TIMESTAMP.timetuple()[:6])
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(entry, data)
+    return buffer.getvalue()
+
+
+def render_forwarded_eml(rng: random.Random) -> bytes:
+    """A forwarded application as an RFC 822 message with the resume attached"""
+    message = EmailMessage()
+    message['From'] = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} <applicant@example.com>"
+    message['To'] = 'hr@example.com'
+    message['Subject'] = 'Application for VLSI role'
+    message['Date'] = FIXED_TIMESTAMP.strftime('%a, %d %b %Y %H:%M:%S +0000')
+    message.set_content('Please find my resume attached.')
+    extension, data = render_resume(rng)
+    maintype, subtype = {'pdf': ('application', 'pdf'), 'docx': (
+        'application', 'vnd.openxmlformats-officedocument.wordprocessingml.document')}[extension]
+    message.add_attachment(data, maintype=maintype, subtype=subtype, filename=f"resume.{extension}")
+    return message.as_bytes()
+
+
+def render_inline_parts(rng: random.Random) -> dict:
+    """A multipart/alternative body carrying a pasted resume as plain text and HTML"""
+    lines = resume_lines(rng)
+    plain = '\n'.join(['Hi, my resume is below.', ''] + lines).encode('utf-8')
+    rows = ''.join(f"<tr><td style=\"font-family:Arial\">{html.escape(line)}</td></tr>" for line in lines)
+    rich = (f"<html><head><style>td {{ padding: 2px; }}</style></head><body><p>Hi, my resume is below.</p>"
+            f"<table>{rows}</table></body></html>").encode('utf-8')
+    return {'partId': '0', 'mimeType': 'multipart/alternative', 'filename': '', 'body': {'size': 0}, 'parts': [
+        {'partId': '0.0', 'mimeType': 'text/plain', 'filename': '',
+         'headers': [{'name': 'Content-Type', 'value': 'text/plain; charset="UTF-8"'}],
+         'body': {'size': len(plain), 'data': _b64(plain)}},
+        {'partId': '0.1', 'mimeType': 'text/html', 'filename': '',
+         'headers': [{'name': 'Content-Type', 'value': 'text/html; charset="UTF-8"'}],
+         'body': {'size': len(rich), 'data': _b64(rich)}}
+    ]}
+
+
+def render_newsletter(rng: random.Random) -> bytes:
+    """A long digest email that names a few skills in passing"""
+    topics = rng.sample(SKILL_POOL, 2)
+    paragraphs = [f"This week: what {topic} means for your next project, plus tips from our readers."
+                  for topic in topics]
+    paragraphs += rng.sample(FILLER, 2) * 4
+    paragraphs.append('You are receiving this digest because you subscribed on our website.')
+    return '\n\n'.join(paragraphs).encode('utf-8')
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+class SyntheticMailbox:
+    """Generated messages plus their attachment payloads"""
+
+    def __init__(self, email_address: str = 'recruiter@example.com'):
+        self.email_address = email_address
+        self.messages = []
+        self.attachments = {}
+        self.history = []
+        self.history_id = 1000
+
+    def add_message(self, message: dict, attachments: dict = None):
+        self.history_id += 1
+        message['historyId'] = str(self.history_id)
+        self.messages.append(message)
+        self.history.append((self.history_id, message['id'], message['threadId']))
+        self.attachments.update(attachments or {})
+        return message
+
+
+def build_message(rng: random.Random, index: int, kind: str, resume_cache: list,
+                  duplicate_rate: float, when: datetime) -> tuple:
+    """Build one Gmail-style message dict and its attachment payloads"""
+    message_id = f"{index:016x}"
+    sender = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} <candidate{index}@example.com>"
+    headers = [
+        {'name': 'From', 'value': sender},
+        {'name': 'To', 'value': 'recruiter@example.com'},
+        {'name': 'Subject', 'value': rng.choice(['Resume', 'Application for VLSI role', 'CV attached',
+                                                 'Job application', 'Candidate profile'])},
+        {'name': 'Date', 'value': when.strftime('%a, %d %b %Y %H:%M:%S +0000')}
+    ]
+    body = 'Hello, please find my resume attached. Regards.'.encode('utf-8')
+    parts = [{'partId': '0', 'mimeType': 'text/plain', 'filename': '',
+              'body': {'size': len(body), 'data': _b64(body)}}]
+    attachments = {}
+
+    if kind == 'inline':
+        parts = [render_inline_parts(rng)]
+    elif kind == 'newsletter':
+        headers[0]['value'] = 'Tech Weekly <digest@example.com>'
+        headers[2]['value'] = 'Your weekly engineering digest'
+        body = render_newsletter(rng)
+        parts[0]['body'] = {'size': len(body), 'data': _b64(body)}
+    elif kind != 'none':
+        if kind in ('pdf', 'docx') and resume_cache and rng.random() < duplicate_rate:
+            kind, data = rng.choice(resume_cache)
+        elif kind == 'pdf':
+            data = render_pdf(resume_lines(rng))
+            resume_cache.append((kind, data))
+        elif kind == 'docx' and DOCX_AVAILABLE:
+            data = render_docx(resume_lines(rng))
+            resume_cache.append((kind, data))
+        elif kind == 'docx':
+            kind, data = 'pdf', render_pdf(resume_lines(rng))
+        elif kind == 'scanned':
+            data = render_scanned_pdf(rng)
+        elif kind == 'encrypted':
+            data = render_encrypted_pdf(resume_lines(rng))
+        elif kind == 'owner_locked':
+            data = render_encrypted_pdf(resume_lines(rng), user_password='')
+        elif kind == 'zip':
+            data = render_agency_zip(rng)
+        elif kind == 'eml':
+            data = render_forwarded_eml(rng)
+        elif kind == 'doc':
+            data = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + rng.randbytes(rng.randint(8000, 30000))
+        else:
+            data = b'\x89PNG\r\n\x1a\n' + rng.randbytes(rng.randint(2000, 20000))
+
+        filename, mime_type = {
+            'pdf': ('resume.pdf', 'application/pdf'),
+            'docx': ('resume.docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+            'scanned': ('resume_scan.pdf', 'application/pdf'),
+            'encrypted': ('resume_protected.pdf', 'application/pdf'),
+            'owner_locked': ('resume_secured.pdf', 'application/pdf'),
+            'doc': ('resume.doc', 'application/msword'),
+            'zip': ('agency_batch.zip', 'application/zip'),
+            'eml': ('Fwd_application.eml', 'message/rfc822'),
+            'image': ('signature.png', 'image/png')
+        }[kind]
+        attachment_id = f"att-{message_id}-1"
+        attachments[attachment_id] = _b64(data)
+        parts.append({'partId': '1', 'mimeType': mime_type, 'filename': filename,
+                      'body': {'attachmentId': attachment_id, 'size': len(data)}})
+
+    message = {
+        'id': message_id,
+        'threadId': message_id,
+        'labelIds': ['INBOX'],
+        'snippet': body.decode('utf-8')[:100],
+        'internalDate': str(int(when.timestamp() * 1000)),
+        'sizeEstimate': sum(q['body']['size'] for p in parts for q in [p, *p.get('parts', [])]),
+        'payload': {'partId': '', 'mimeType': 'multipart/mixed', 'filename': '',
+                    'headers': headers, 'body': {'size': 0}, 'parts': parts}
+    }
+    return message, attachments
+
+
+def generate_mailbox(size: int, attachment_mix: dict = None, duplicate_rate: float = 0.1,
+                     seed: int = 42) -> SyntheticMailbox:
+    """Generate a deterministic mailbox of `size` messages"""
+    rng = random.Random(seed)
+    mix = attachment_mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    mailbox = SyntheticMailbox()
+    resume_cache = []
+    start = datetime(2024, 1, 1)
+
+    for index in range(size):
+        kind = rng.choices(kinds, weights)[0]
+        when = start + timedelta(minutes=17 * index)
+        message, attachments = build_message(rng, index, kind, resume_cache, duplicate_rate, when)
+        mailbox.add_message(message, attachments)
+
+    return mailbox
@@ -0,0 +1,268 @@
+"""Compact in-memory candidate storage
+
+A candidate dict costs well over a kilobyte once every string, float and
+the nested skills dict are counted. The scanner keeps every candidate in
+process for filtering and listing, so `CandidateTable` stores them
+column-wise instead:
+
+  * numeric fields live in typed `array` columns (a few bytes each),
+  * (category, skill) pairs and run ids are interned to small integer ids,
+    and each candidate's skills are a slice of one flat id array,
+  * free-text fields are UTF-8 bytes in one shared arena, addressed by
+    offsets, so there is no per-string object header.
+
+Rows are materialised back into the usual candidate dicts on access.
+A table can also be opened read-only over a memory-mapped snapshot (see
+index_snapshot.py) and used as the `base` of a writable table that holds
+only candidates added since.
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+from index_snapshot import SnapshotFormatError
+
+# Free-text fields kept in the arena, in per-row order
+TEXT_FIELDS = ('content_hash', 'message_id', 'name', 'email', 'phone', 'sender', 'subject',
+               'received', 'filename', 'drive_file_id', 'created_at')
+
+
+class Interner:
+    """Bidirectional value <-> small integer id map"""
+
+    __slots__ = ('ids', 'values')
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+    @classmethod
+    def from_values(cls, values) -> 'Interner':
+        interner = cls()
+        for value in values:
+            interner.intern(value)
+        return interner
+
+    def __getitem__(self, value_id: int):
+        return self.values[value_id]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TextArena:
+    """Append-only UTF-8 string storage addressed by sequence number"""
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+
+    def append(self, text) -> int:
+        self.data += (text or '').encode('utf-8')
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def get(self, index: int) -> str:
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class CandidateTable:
+    """Columnar, append-only store of candidates keyed by candidate id"""
+
+    # (attribute, array typecode) of every fixed-width column, as stored in snapshots
+    COLUMNS = (('ids', 'q'), ('experience', 'f'), ('fresher', 'B'), ('run_ids', 'I'),
+               ('skill_offsets', 'I'), ('skill_ids', 'H'), ('_order', 'I'))
+
+    def __init__(self, base: 'CandidateTable' = None):
+        self.base = base
+        self.readonly = False
+        self.ids = array('q')
+        self.experience = array('f')
+        self.fresher = array('B')
+        # Every push or scheduled run gets a new id, so 16 bits would run out
+        self.run_ids = array('I')
+        self.skill_offsets = array('I', [0])
+        self.skill_ids = array('H')
+        self.skills = base.skills if base else Interner()
+        self.runs = base.runs if base else Interner()
+        self.text = TextArena()
+        self._order = array('I')  # row numbers sorted by candidate id
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids) + (len(self.base) if self.base else 0)
+
+    def __contains__(self, candidate_id: int) -> bool:
+        return self._locate(candidate_id) is not None
+
+    def __iter__(self):
+        """Candidates in id order"""
+        own = (self._materialise(self._order[position]) for position in range(len(self._order)))
+        if self.base:
+            return heapq.merge(iter(self.base), own, key=itemgetter('id'))
+        return own
+
+    def row_of(self, candidate_id: int):
+        """Row of `candidate_id` in this table's own columns, ignoring the base"""
+        position = bisect_left(self._order, candidate_id, key=self.ids.__getitem__)
+        if position < len(self._order) and self.ids[self._order[position]] == candidate_id:
+            return self._order[position]
+        return None
+
+    def _locate(self, candidate_id: int):
+        if self.base:
+            row = self.base.row_of(candidate_id)
+            if row is not None:
+                return self.base, row
+        row = self.row_of(candidate_id)
+        return None if row is None else (self, row)
+
+    def add(self, candidate: dict):
+        """Append a candidate dict (with `id`); re-adding an id is a no-op"""
+        if self.readonly:
+            raise TypeError('Candidate table is a read-only snapshot')
+        with self._lock:
+            if self._locate(candidate['id']) is not None:
+                return
+            row = len(self.ids)
+            for category, names in candidate.get('skills', {}).items():
+                for name in names:
+                    self.skill_ids.append(self.skills.intern((category, name)))
+            self.skill_offsets.append(len(self.skill_ids))
+            for field in TEXT_FIELDS:
+                self.text.append(candidate.get(field))
+            self.experience.append(candidate.get('experience_years') or 0.0)
+            self.fresher.append(1 if candidate.get('fresher') else 0)
+            self.run_ids.append(self.runs.intern(candidate.get('run_id') or ''))
+            self.ids.append(candidate['id'])
+            # Persist workers can finish slightly out of id order; ids mostly arrive ascending
+            # so the insort is an append or a short memmove near the tail
+            if not self._order or self.ids[self._order[-1]] < candidate['id']:
+                self._order.append(row)
+            else:
+                insort(self._order, row, key=self.ids.__getitem__)
+
+    def get(self, candidate_id: int):
+        found = self._locate(candidate_id)
+        return None if found is None else found[0]._materialise(found[1])
+
+    def get_many(self, candidate_ids: list) -> list:
+        """Candidates for `candidate_ids` in the requested order, skipping unknown ids"""
+        found = []
+        for candidate_id in candidate_ids:
+            location = self._locate(candidate_id)
+            if location is not None:
+                found.append(location[0]._materialise(location[1]))
+        return found
+
+    def _materialise(self, row: int) -> dict:
+        candidate = {'id': self.ids[row]}
+        base = row * len(TEXT_FIELDS)
+        for offset, field in enumerate(TEXT_FIELDS):
+            candidate[field] = self.text.get(base + offset)
+        candidate['drive_file_id'] = candidate['drive_file_id'] or None
+        skills = {}
+        for skill_id in self.skill_ids[self.skill_offsets[row]:self.skill_offsets[row + 1]]:
+            category, name = self.skills[skill_id]
+            skills.setdefault(category, []).append(name)
+        candidate.update({
+            'run_id': self.runs[self.run_ids[row]],
+            'experience_years': round(self.experience[row], 2),
+            'fresher': bool(self.fresher[row]),
+            'skills': skills,
+            'skill_count': self.skill_offsets[row + 1] - self.skill_offsets[row]
+        })
+        return candidate
+
+    def nbytes(self) -> int:
+        """Approximate payload size of the columns, excluding the interned values"""
+        own = sum(len(getattr(self, name)) * array(typecode).itemsize for name, typecode in self.COLUMNS)
+        return own + self.text.nbytes() + (self.base.nbytes() if self.base else 0)
+
+    # ------------------------------------------------------------ snapshots
+
+    def snapshot_sections(self) -> tuple:
+        """Base and own rows merged into flat columns, for index_snapshot
+
+        The sections are copies, so they can be written out after the lock is released.
+        """
+        with self._lock:
+            if self.base is None:
+                columns = {name: getattr(self, name)[:] for name, _ in self.COLUMNS}
+                text_data, text_offsets = self.text.data, self.text.offsets[:]
+            else:
+                columns, text_data, text_offsets = self._merged_columns()
+            ids = columns['ids']
+            meta = {
+                'count': len(ids),
+                'max_id': max(ids) if len(ids) else 0,
+                'text_fields': list(TEXT_FIELDS),
+                'skills': [list(pair) for pair in self.skills.values],
+                'runs': list(self.runs.values)
+            }
+            sections = {f"candidates.{name}": data for name, data in columns.items()}
+            sections.update({'candidates.text': bytes(text_data), 'candidates.text_offsets': text_offsets})
+        return sections, {'candidates': meta}
+
+    def _merged_columns(self) -> tuple:
+        base, rows = self.base, len(self.base)
+        columns = {}
+        for name, typecode in self.COLUMNS:
+            if name in ('skill_offsets', '_order'):
+                continue
+            merged = array(typecode, getattr(base, name).tobytes())
+            merged.extend(getattr(self, name))
+            columns[name] = merged
+
+        skill_offsets = array('I', base.skill_offsets.tobytes())
+        shift = skill_offsets[-1]
+        skill_offsets.extend(offset + shift for offset in self.skill_offsets[1:])
+        columns['skill_offsets'] = skill_offsets
+
+        order = array('I', base._order.tobytes())
+        if len(self._order) and len(order) and columns['ids'][order[-1]] > self.ids[self._order[0]]:
+            # Rare: a candidate older than the snapshot arrived after it; fall back to a full sort
+            order = array('I', sorted(range(len(columns['ids'])), key=columns['ids'].__getitem__))
+        else:
+            order.extend(row + rows for row in self._order)
+        columns['_order'] = order
+
+        text_data = bytearray(base.text.data)
+        text_offsets = array('I', base.text.offsets.tobytes())
+        shift = len(text_data)
+        text_data += self.text.data
+        text_offsets.extend(offset + shift for offset in self.text.offsets[1:])
+        return columns, text_data, text_offsets
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'CandidateTable':
+        """Read-only table whose columns are views into a mapped IndexSnapshot"""
+        meta = snapshot.meta['candidates']
+        if tuple(meta['text_fields']) != TEXT_FIELDS:
+            raise SnapshotFormatError('Candidate snapshot has different text fields')
+        table = cls()
+        for name, typecode in cls.COLUMNS:
+            setattr(table, name, snapshot.section(f"candidates.{name}", typecode))
+        table.text.data = snapshot.section('candidates.text')
+        table.text.offsets = snapshot.section('candidates.text_offsets', 'I')
+        table.skills = Interner.from_values(tuple(pair) for pair in meta['skills'])
+        table.runs = Interner.from_values(meta['runs'])
+        table.readonly = True
+        if len(table.ids) != meta['count']:
+            raise SnapshotFormatError('Candidate snapshot row count does not match its columns')
+        return table
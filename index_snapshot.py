@@ -0,0 +1,101 @@
+"""Versioned, memory-mapped snapshot file for the in-memory search structures
+
+A snapshot is one file holding the skill bitmaps and candidate columns as
+raw, 8-byte aligned sections plus a JSON directory:
+
+    0   magic      8 bytes  b'VLSIIDX\\x00'
+    8   version    uint32   FORMAT_VERSION
+    12  reserved   uint32
+    16  dir_offset uint64   byte offset of the JSON directory
+    24  dir_length uint64
+    32  dir_crc    uint32   crc32 of the directory bytes
+    ... sections ...
+    directory: {"sections": {name: [offset, length]}, "meta": {...}}
+
+Opening a snapshot maps the file and parses only the header and the
+directory, so it costs the same for ten candidates or ten million; pages
+are faulted in as queries touch them. Writers build the file next to the
+target and `os.replace` it into place, so readers see either the old or
+the new snapshot, never a partial one.
+"""
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+
+MAGIC = b'VLSIIDX\x00'
+FORMAT_VERSION = 2
+_HEADER = struct.Struct('<8sIIQQI')
+_ALIGN = 8
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a snapshot file is truncated, corrupt or from another format version"""
+
+
+def write_snapshot(path: str, sections: dict, meta: dict):
+    """Atomically write `sections` ({name: bytes-like}) and `meta` to `path`"""
+    meta = dict(meta, byteorder=sys.byteorder)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    directory = {}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(bytes(_HEADER.size))
+            for name, data in sections.items():
+                position = f.tell()
+                padding = -position % _ALIGN
+                f.write(bytes(padding))
+                data = memoryview(data).cast('B')
+                directory[name] = [position + padding, len(data)]
+                f.write(data)
+            encoded = json.dumps({'sections': directory, 'meta': meta}, separators=(',', ':')).encode('utf-8')
+            dir_offset = f.tell()
+            f.write(encoded)
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, dir_offset, len(encoded), zlib.crc32(encoded)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class IndexSnapshot:
+    """Read-only view of a snapshot file; section views stay valid while referenced"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise SnapshotFormatError(f"{path} is truncated")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, dir_offset, dir_length, dir_crc = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{path} is not a search index snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        if dir_offset + dir_length > size:
+            raise SnapshotFormatError(f"{path} is truncated")
+        encoded = self._map[dir_offset:dir_offset + dir_length]
+        if zlib.crc32(encoded) != dir_crc:
+            raise SnapshotFormatError(f"{path} has a corrupt directory")
+        directory = json.loads(encoded)
+        self.sections = directory['sections']
+        self.meta = directory['meta']
+        if self.meta.get('byteorder') != sys.byteorder:
+            raise SnapshotFormatError(f"{path} was written on a {self.meta.get('byteorder')}-endian host")
+        self._view = memoryview(self._map)
+
+    def section(self, name: str, typecode: str = 'B') -> memoryview:
+        offset, length = self.sections[name]
+        return self._view[offset:offset + length].cast(typecode)
+
+    @property
+    def size(self) -> int:
+        return len(self._map)
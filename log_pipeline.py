@@ -0,0 +1,151 @@
+"""Non-blocking log output
+
+Request and scan threads only put records on a bounded queue; a single
+background QueueListener formats them (JSON lines by default) and writes
+them to stdout. A slow or blocked stdout therefore delays log lines, not
+scans. When the queue is full the record is dropped and counted rather
+than blocking the caller; the next record that gets through carries the
+number dropped before it.
+
+Repetitive per-message logs (stage failures, Drive upload warnings) go
+through a LogSampler, which lets a burst through per key and interval and
+counts the rest, so one broken mailbox cannot flood the output.
+"""
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_BURST = int(os.environ.get('LOG_SAMPLE_BURST', 20))
+LOG_SAMPLE_INTERVAL = float(os.environ.get('LOG_SAMPLE_INTERVAL', 60))
+# How long shutdown waits for queued records to be written
+LOG_FLUSH_TIMEOUT = 5.0
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via `extra` and goes into the JSON
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the `extra` fields of the record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped and counted while the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+        self._unreported = 0
+        self._count_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._count_lock:
+            if self._unreported:
+                record.dropped_before = self._unreported
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                self._unreported += 1
+                return
+            self.enqueued += 1
+            self._unreported = 0
+
+
+class BackgroundWriter(QueueListener):
+    """QueueListener whose shutdown waits a bounded time for the backlog instead of hanging on a stuck stdout"""
+
+    def stop(self, timeout: float = LOG_FLUSH_TIMEOUT):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class LogSampler:
+    """Per-key rate limit: `burst` records per `interval` seconds pass, the rest are counted"""
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, interval: float = LOG_SAMPLE_INTERVAL,
+                 clock=time.monotonic):
+        self.burst = burst
+        self.interval = interval
+        self.suppressed = 0
+        self._clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str):
+        """None to suppress, else how many records of `key` were suppressed since the last one let through"""
+        now = self._clock()
+        with self._lock:
+            started, passed, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.interval:
+                started, passed = now, 0
+            if passed >= self.burst:
+                self._windows[key] = (started, passed, suppressed + 1)
+                self.suppressed += 1
+                return None
+            self._windows[key] = (started, passed + 1, 0)
+            return suppressed
+
+
+class LogPipeline:
+    """Bounded queue in front of one background writer"""
+
+    def __init__(self, stream, queue_size: int = LOG_QUEUE_SIZE, fmt: str = LOG_FORMAT):
+        self.queue = queue.Queue(queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+        self.listener = BackgroundWriter(self.queue, output)
+        self._started = False
+
+    def install(self, logger: logging.Logger = None, level: int = logging.INFO):
+        """Make this pipeline the only handler of `logger` (the root logger by default) and start writing"""
+        logger = logger or logging.getLogger()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(self.handler)
+        logger.setLevel(level)
+        if not self._started:
+            self.listener.start()
+            self._started = True
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Flush what is queued and stop the writer"""
+        if self._started:
+            self._started = False
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {
+            'queued': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'enqueued': self.handler.enqueued,
+            'dropped': self.handler.dropped
+        }
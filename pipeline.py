@@ -0,0 +1,201 @@
+"""Threaded stage pipeline connected by bounded queues
+
+Each stage owns an input queue with a fixed capacity and a pool of worker
+threads. A worker blocks on `put()` when the next stage's queue is full,
+so a fast producer (e.g. the Gmail lister) is throttled to the pace of
+the slowest downstream stage instead of buffering unbounded work.
+"""
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def parse_stage_config(spec: str, cast=int) -> dict:
+    """Parse 'download=4,extract=2' into {'download': 4, 'extract': 2}"""
+    config = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, _, value = item.partition('=')
+            config[name.strip()] = cast(value)
+    return config
+
+
+class Stage:
+    """One processing step: `func(item)` returns an iterable of outputs
+    (empty to drop the item, several to fan out)"""
+
+    def __init__(self, name: str, func, workers: int = 1, queue_size: int = 64):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.input = queue.Queue(maxsize=self.queue_size)
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def handle(self, item, emit):
+        for output in self.func(item) or ():
+            emit(output)
+
+    def finish(self, emit):
+        """Called once per worker after its input is exhausted"""
+
+    def metrics(self, elapsed: float) -> dict:
+        capacity = self.workers * elapsed
+        return {
+            'workers': self.workers,
+            'busy_workers': self.busy,
+            'queue_depth': self.input.qsize(),
+            'queue_capacity': self.queue_size,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            # Time spent blocked on a full downstream queue is backpressure, not work
+            'utilization': round((self.busy_seconds - self.blocked_seconds) / capacity, 3) if capacity else 0.0
+        }
+
+
+class BatchStage(Stage):
+    """Stage whose `func(batch)` receives lists of up to `batch_size` items"""
+
+    def __init__(self, name: str, func, batch_size: int = 50, queue_size: int = 64):
+        super().__init__(name, func, workers=1, queue_size=queue_size)
+        self.batch_size = max(1, batch_size)
+        self._batch = []
+
+    def handle(self, item, emit):
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self._flush(emit)
+
+    def finish(self, emit):
+        if self._batch:
+            self._flush(emit)
+
+    def _flush(self, emit):
+        batch, self._batch = self._batch, []
+        for output in self.func(batch) or ():
+            emit(output)
+
+
+class Pipeline:
+    """Runs a chain of stages to completion on background threads"""
+
+    def __init__(self, stages: list, on_error=None, name: str = 'pipeline'):
+        self.stages = stages
+        self.on_error = on_error
+        self.name = name
+        self.started = None
+        self.finished = None
+        self._remaining = {}
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.started is not None and self.finished is None
+
+    def run(self, seeds=(None,)):
+        """Feed `seeds` into the first stage and block until every stage drains"""
+        self.started = time.monotonic()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            self._remaining[index] = stage.workers
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"{self.name}-{stage.name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        first = self.stages[0]
+        for seed in seeds:
+            first.input.put(seed)
+        for _ in range(first.workers):
+            first.input.put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        self.finished = time.monotonic()
+        return self
+
+    def metrics(self) -> dict:
+        if self.started is None:
+            return {}
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            'running': self.running,
+            'elapsed_seconds': round(elapsed, 3),
+            'stages': {stage.name: stage.metrics(elapsed) for stage in self.stages}
+        }
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        def emit(output):
+            with stage._lock:
+                stage.emitted += 1
+            if downstream is None:
+                return
+            blocked = time.monotonic()
+            downstream.input.put(output)
+            waited = time.monotonic() - blocked
+            if waited > 0.001:
+                with stage._lock:
+                    stage.blocked_seconds += waited
+
+        try:
+            while True:
+                item = stage.input.get()
+                if item is _DONE:
+                    break
+                began = time.monotonic()
+                with stage._lock:
+                    stage.busy += 1
+                try:
+                    stage.handle(item, emit)
+                except Exception as e:
+                    with stage._lock:
+                        stage.errors += 1
+                    self._report(stage, item, e)
+                finally:
+                    with stage._lock:
+                        stage.busy -= 1
+                        stage.processed += 1
+                        stage.busy_seconds += time.monotonic() - began
+
+            try:
+                stage.finish(emit)
+            except Exception as e:
+                with stage._lock:
+                    stage.errors += 1
+                self._report(stage, None, e)
+        finally:
+            # The last worker out closes the next stage, even if this one died, so run() cannot hang
+            with self._lock:
+                self._remaining[index] -= 1
+                last = self._remaining[index] == 0
+            if last and downstream is not None:
+                for _ in range(downstream.workers):
+                    downstream.input.put(_DONE)
+
+    def _report(self, stage: Stage, item, error: Exception):
+        """Hand a failure to `on_error`; a failing handler is logged instead of killing the worker"""
+        if not self.on_error:
+            logger.error(f"❌ Stage {stage.name} failed: {error}")
+            return
+        try:
+            self.on_error(stage.name, item, error)
+        except Exception as e:
+            logger.error(f"❌ Error handler failed for stage {stage.name}: {e} (after: {error})")
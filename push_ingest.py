@@ -0,0 +1,137 @@
+"""Coalescing queue for Gmail push notifications
+
+Gmail publishes one Pub/Sub message per mailbox change, so a burst of
+incoming mail produces a burst of notifications. Each notification only
+carries the latest historyId, so all notifications for a mailbox that
+arrive inside the coalescing window collapse into a single incremental
+run using the highest historyId seen.
+"""
+import time
+import base64
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PushPayloadError(ValueError):
+    """Raised when a push request body is not a valid Gmail notification"""
+
+
+def parse_push_envelope(envelope: dict) -> tuple:
+    """Decode a Pub/Sub push envelope into (email_address, history_id)"""
+    if not isinstance(envelope, dict) or not isinstance(envelope.get('message'), dict):
+        raise PushPayloadError('Missing Pub/Sub message')
+    data = envelope['message'].get('data')
+    if not data:
+        raise PushPayloadError('Missing message data')
+    try:
+        padded = data + '=' * (-len(data) % 4)
+        notification = json.loads(base64.b64decode(padded.replace('-', '+').replace('_', '/')))
+        email_address = notification['emailAddress']
+        history_id = int(notification['historyId'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise PushPayloadError(f'Invalid notification data: {e}') from e
+    return email_address, history_id
+
+
+def build_push_envelope(email_address: str, history_id: int, message_id: str = '1',
+                        subscription: str = 'projects/local/subscriptions/gmail-push') -> dict:
+    """Build a Pub/Sub push envelope the way Google delivers it"""
+    data = json.dumps({'emailAddress': email_address, 'historyId': history_id}).encode('utf-8')
+    return {
+        'message': {
+            'data': base64.b64encode(data).decode('ascii'),
+            'messageId': message_id,
+            'publishTime': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        },
+        'subscription': subscription
+    }
+
+
+class PushCoalescer:
+    """Debounces notifications per mailbox and runs one handler call per burst"""
+
+    def __init__(self, handler, window_seconds: float = 2.0):
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.stats = {
+            'notifications_received': 0,
+            'notifications_coalesced': 0,
+            'runs_started': 0,
+            'runs_failed': 0
+        }
+        self._pending = {}
+        self._running = set()
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def submit(self, email_address: str, history_id: int):
+        """Record a notification; returns immediately"""
+        with self._cond:
+            self.stats['notifications_received'] += 1
+            pending = self._pending.get(email_address)
+            if pending:
+                self.stats['notifications_coalesced'] += 1
+                pending['history_id'] = max(pending['history_id'], history_id)
+            else:
+                self._pending[email_address] = {
+                    'history_id': history_id,
+                    'due': time.monotonic() + self.window_seconds
+                }
+            self._ensure_worker()
+            self._cond.notify()
+
+    def pending(self) -> dict:
+        with self._cond:
+            return {email: p['history_id'] for email, p in self._pending.items()}
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until nothing is pending or running (used by offline tooling)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='gmail-push', daemon=True)
+            self._worker.start()
+
+    def _next_due(self):
+        """Pop the earliest due mailbox that is not already running"""
+        now = time.monotonic()
+        ready = [(p['due'], email) for email, p in self._pending.items()
+                 if email not in self._running]
+        if not ready:
+            return None, None
+        due, email = min(ready)
+        if due > now:
+            return None, due - now
+        self._running.add(email)
+        return (email, self._pending.pop(email)['history_id']), None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job, wait = self._next_due()
+                while job is None:
+                    self._cond.wait(wait)
+                    job, wait = self._next_due()
+                self.stats['runs_started'] += 1
+
+            email_address, history_id = job
+            try:
+                self.handler(email_address, history_id)
+            except Exception as e:
+                self.stats['runs_failed'] += 1
+                logger.error(f"❌ Push processing failed for {email_address}: {e}")
+            finally:
+                with self._cond:
+                    self._running.discard(email_address)
+                    self._cond.notify_all()
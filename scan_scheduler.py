@@ -0,0 +1,268 @@
+"""In-process scheduler for incremental mailbox scans
+
+Scans can be requested from three places: the dashboard button, a
+periodic schedule per mailbox label, and Gmail push notifications. They
+all go through `ScanScheduler.trigger`, which keeps at most one queued
+run per job key and folds later triggers into it, so a push arriving
+while a scheduled scan is queued does not cause a second pass over the
+same history.
+
+Periodic jobs fire on a jittered interval so several workers (or several
+deployments sharing a Google project) do not hit the Gmail quota in
+lockstep. Runs execute on background threads, capped globally and per
+account, so scan work never occupies a gunicorn request thread; when the
+caps bind, interactive triggers (manual or push) start before purely
+scheduled ones.
+"""
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Trigger sources; anything other than SCHEDULED counts as interactive
+MANUAL, SCHEDULED, PUSH = 'manual', 'scheduled', 'push'
+
+
+class ScanTicket:
+    """One queued or running scan; every trigger folded into the run shares the ticket"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.sources = set()
+        self.full = False
+        self.created = time.monotonic()
+        self.started_at = None
+        self.deferred = False
+        self.result = None
+        self._done = threading.Event()
+
+    @property
+    def interactive(self) -> bool:
+        return bool(self.sources - {SCHEDULED})
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None):
+        """Result dict of the run, or None if it has not finished within `timeout`"""
+        self._done.wait(timeout)
+        return self.result
+
+    def state(self) -> dict:
+        """JSON-friendly view for callers that do not wait for the run"""
+        return {
+            'key': self.key,
+            'state': 'finished' if self.done else 'running' if self.started_at else 'queued',
+            'sources': sorted(self.sources),
+            'full': self.full,
+            'started_at': self.started_at,
+            'result': self.result
+        }
+
+
+class ScanJob:
+    """A mailbox label scanned on an interval (interval None means trigger-only)"""
+
+    def __init__(self, key: str, account: str, label_id: str, interval_seconds: float = None):
+        self.key = key
+        self.account = account
+        self.label_id = label_id
+        self.interval_seconds = interval_seconds
+        self.next_due = None
+        self.last_run_at = None
+        self.last_result = None
+        self.runs = 0
+
+
+class ScanScheduler:
+    """Runs `runner(job, ticket) -> dict` for due or triggered jobs on background threads
+
+    A runner result with a truthy 'skipped' key (e.g. nothing to scan yet) is
+    counted separately from failures.
+    """
+
+    def __init__(self, runner, max_concurrent: int = 1, per_account_limit: int = 1,
+                 jitter: float = 0.1, rng: random.Random = None):
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_account_limit = max(1, per_account_limit)
+        self.jitter = jitter
+        self.jobs = {}
+        self.stats = {
+            'triggers': 0,
+            'triggers_coalesced': 0,
+            'runs_started': 0,
+            'runs_failed': 0,
+            'runs_skipped': 0,
+            'runs_deferred': 0
+        }
+        self._rng = rng or random.Random()
+        self._pending = {}
+        self._running = {}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+
+    # ------------------------------------------------------------ configuration
+
+    def add_job(self, key: str, account: str, label_id: str, interval_seconds: float = None) -> ScanJob:
+        with self._cond:
+            job = self.jobs.get(key) or ScanJob(key, account, label_id)
+            job.account, job.label_id, job.interval_seconds = account, label_id, interval_seconds
+            if interval_seconds:
+                # First run a full (jittered) interval after startup, not all at once on boot
+                job.next_due = time.monotonic() + self._jittered(interval_seconds)
+            self.jobs[key] = job
+            self._ensure_dispatcher()
+            self._cond.notify_all()
+            return job
+
+    def remove_job(self, key: str):
+        with self._cond:
+            self.jobs.pop(key, None)
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self.jitter * self._rng.uniform(-1, 1))
+
+    # ------------------------------------------------------------ triggering
+
+    def trigger(self, key: str, source: str = MANUAL, full: bool = False) -> ScanTicket:
+        """Request a run of job `key`, folding into a queued or compatible running one"""
+        with self._cond:
+            if key not in self.jobs:
+                raise KeyError(f"Unknown scan job: {key}")
+            return self._trigger_locked(key, source, full)
+
+    def _trigger_locked(self, key: str, source: str, full: bool) -> ScanTicket:
+        self.stats['triggers'] += 1
+        running = self._running.get(key)
+        # A running scan already covers manual and scheduled requests, but a push
+        # means mail arrived after it started, so that queues one follow-up run
+        if running and source != PUSH and (running.full or not full):
+            running.sources.add(source)
+            self.stats['triggers_coalesced'] += 1
+            return running
+
+        ticket = self._pending.get(key)
+        if ticket:
+            self.stats['triggers_coalesced'] += 1
+        else:
+            ticket = self._pending[key] = ScanTicket(key)
+        ticket.sources.add(source)
+        ticket.full = ticket.full or full
+        self._ensure_dispatcher()
+        self._cond.notify_all()
+        return ticket
+
+    # ------------------------------------------------------------ introspection
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            return {
+                'jobs': {
+                    key: {
+                        'label_id': job.label_id,
+                        'interval_seconds': job.interval_seconds,
+                        'next_run_in_seconds': round(job.next_due - now, 1) if job.next_due else None,
+                        'last_run_at': job.last_run_at,
+                        'runs': job.runs,
+                        'last_result': job.last_result
+                    } for key, job in self.jobs.items()
+                },
+                'running': {key: sorted(t.sources) for key, t in self._running.items()},
+                'pending': {key: sorted(t.sources) for key, t in self._pending.items()},
+                'limits': {'max_concurrent': self.max_concurrent, 'per_account': self.per_account_limit},
+                'stats': dict(self.stats)
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until nothing is pending or running (used by offline tooling)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    # ------------------------------------------------------------ dispatching
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, name='scan-scheduler', daemon=True)
+            self._dispatcher.start()
+
+    def _fire_due_jobs(self, now: float):
+        for job in self.jobs.values():
+            if job.next_due is not None and job.next_due <= now:
+                self._trigger_locked(job.key, SCHEDULED, False)
+                job.next_due = now + self._jittered(job.interval_seconds)
+
+    def _startable(self) -> list:
+        """Pending tickets that fit under the caps, interactive first"""
+        account_load = {}
+        for key in self._running:
+            account = self.jobs[key].account if key in self.jobs else None
+            account_load[account] = account_load.get(account, 0) + 1
+        slots = self.max_concurrent - len(self._running)
+        startable = []
+        for ticket in sorted(self._pending.values(), key=lambda t: (not t.interactive, t.created)):
+            job = self.jobs.get(ticket.key)
+            if ticket.key in self._running:
+                continue
+            account = job.account if job else None
+            if slots <= 0 or account_load.get(account, 0) >= self.per_account_limit:
+                if not ticket.deferred:
+                    ticket.deferred = True
+                    self.stats['runs_deferred'] += 1
+                continue
+            slots -= 1
+            account_load[account] = account_load.get(account, 0) + 1
+            startable.append(ticket)
+        return startable
+
+    def _next_wake(self, now: float):
+        due = [job.next_due for job in self.jobs.values() if job.next_due is not None]
+        return max(0.0, min(due) - now) if due else None
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                self._fire_due_jobs(now)
+                for ticket in self._startable():
+                    del self._pending[ticket.key]
+                    self._running[ticket.key] = ticket
+                    ticket.started_at = datetime.now().isoformat()
+                    self.stats['runs_started'] += 1
+                    threading.Thread(target=self._execute, args=(ticket,), name=f"scan-{ticket.key}",
+                                     daemon=True).start()
+                self._cond.wait(self._next_wake(now))
+
+    def _execute(self, ticket: ScanTicket):
+        job = self.jobs.get(ticket.key)
+        try:
+            result = self.runner(job, ticket)
+        except Exception as e:
+            logger.error(f"❌ Scheduled scan {ticket.key} failed: {e}")
+            result = {'success': False, 'error': str(e)}
+        with self._cond:
+            if result.get('skipped'):
+                self.stats['runs_skipped'] += 1
+            elif not result.get('success'):
+                self.stats['runs_failed'] += 1
+            if job:
+                job.runs += 1
+                job.last_run_at = ticket.started_at
+                job.last_result = {k: result.get(k) for k in ('success', 'skipped', 'error', 'run_id',
+                                                             'emails_scanned', 'resumes_found') if k in result}
+                job.last_result['sources'] = sorted(ticket.sources)
+            del self._running[ticket.key]
+            ticket.result = result
+            ticket._done.set()
+            self._cond.notify_all()
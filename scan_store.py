@@ -0,0 +1,490 @@
+"""SQLite persistence for scan runs, checkpoints and candidates
+
+Everything a scan produces is written here as it happens, so a gunicorn
+worker that is recycled (--max-requests) or killed (--timeout) mid-scan
+loses at most one checkpoint interval of bookkeeping. The next scan for
+the same query picks the interrupted run back up from its checkpoint.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_runs (
+    run_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    query TEXT,
+    status TEXT NOT NULL,
+    owner TEXT,
+    started_at TEXT,
+    updated_at TEXT,
+    finished_at TEXT,
+    emails_scanned INTEGER DEFAULT 0,
+    resumes_found INTEGER DEFAULT 0,
+    page_token TEXT,
+    listing_done INTEGER DEFAULT 0,
+    stage_offsets TEXT,
+    resumed_count INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS processed_messages (
+    run_id TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    PRIMARY KEY (run_id, message_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS attachments (
+    content_hash TEXT PRIMARY KEY,
+    run_id TEXT,
+    message_id TEXT,
+    filename TEXT,
+    mime_type TEXT,
+    size INTEGER,
+    is_resume INTEGER DEFAULT 0,
+    seen_at TEXT
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT UNIQUE,
+    run_id TEXT,
+    message_id TEXT,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    experience_years REAL,
+    fresher INTEGER,
+    skills TEXT,
+    skill_count INTEGER,
+    sender TEXT,
+    subject TEXT,
+    received TEXT,
+    filename TEXT,
+    drive_file_id TEXT,
+    created_at TEXT,
+    exported INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS history_cursors (
+    label_id TEXT PRIMARY KEY,
+    history_id INTEGER NOT NULL,
+    updated_at TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    spreadsheet_id TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    row_number INTEGER NOT NULL,
+    row_hash TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_candidates_unexported ON candidates (exported) WHERE exported = 0;
+CREATE INDEX IF NOT EXISTS idx_candidates_run ON candidates (run_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_run ON attachments (run_id);
+"""
+
+CANDIDATE_COLUMNS = ('content_hash', 'run_id', 'message_id', 'name', 'email', 'phone', 'experience_years',
+                     'fresher', 'skills', 'skill_count', 'sender', 'subject', 'received', 'filename',
+                     'drive_file_id', 'created_at')
+
+
+# Containers restart with the same hostname and often pid 1, so hostname:pid alone can match a dead process
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def process_owner() -> str:
+    """Identify this worker process, so runs left 'running' by a dead one can be told apart"""
+    return f"{socket.gethostname()}:{os.getpid()}:{BOOT_ID}"
+
+
+class ScanStore:
+    """Thread-safe wrapper around one SQLite database file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+            # Random id created with the database, so files derived from it can tell it from any other
+            self._conn.execute('INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, ?)',
+                               ('database_id', uuid.uuid4().hex))
+            self.database_id = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'database_id'").fetchone()[0]
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _transaction(self, statements: list):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    # ------------------------------------------------------------ runs
+
+    def start_run(self, kind: str, query: str = None, history_baseline: int = None) -> str:
+        """Record a new run; a full scan passes the mailbox historyId it started from"""
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        now = datetime.now().isoformat()
+        statements = [(
+            'INSERT INTO scan_runs (run_id, kind, query, status, owner, started_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (run_id, kind, query, 'running', process_owner(), now, now)
+        )]
+        if history_baseline is not None:
+            statements.append(('INSERT INTO store_meta (key, value) VALUES (?, ?)',
+                               (f"history_baseline:{run_id}", str(history_baseline))))
+        self._transaction(statements)
+        return run_id
+
+    def run_history_baseline(self, run_id: str):
+        """historyId the full scan `run_id` started from, or None"""
+        row = self._execute('SELECT value FROM store_meta WHERE key = ?', (f"history_baseline:{run_id}",)).fetchone()
+        return int(row[0]) if row else None
+
+    def find_interrupted_run(self, kind: str, query: str = None):
+        """Latest run of this kind that was interrupted or left running by a dead process"""
+        row = self._execute(
+            'SELECT * FROM scan_runs WHERE kind = ? AND query IS ? '
+            "AND (status = 'interrupted' OR (status = 'running' AND owner != ?)) "
+            'ORDER BY started_at DESC LIMIT 1',
+            (kind, query, process_owner())
+        ).fetchone()
+        return dict(row) if row else None
+
+    def claim_run(self, run_id: str):
+        """Take ownership of an interrupted run before resuming it"""
+        self._execute(
+            'UPDATE scan_runs SET owner = ?, updated_at = ?, resumed_count = resumed_count + 1 WHERE run_id = ?',
+            (process_owner(), datetime.now().isoformat(), run_id)
+        )
+
+    def fail_orphaned_runs(self) -> int:
+        """Mark unfinished push, incremental and scheduled runs as failed
+
+        Only full scans resume from a checkpoint; history scans start over from
+        their label's cursor, so one left 'interrupted', or 'running' by a dead
+        process, would otherwise stay unfinished.
+        """
+        now = datetime.now().isoformat()
+        return self._execute(
+            "UPDATE scan_runs SET status = 'failed', finished_at = ?, updated_at = ? WHERE kind != 'full' "
+            "AND (status = 'interrupted' OR (status = 'running' AND owner != ?))",
+            (now, now, process_owner())
+        ).rowcount
+
+    def list_runs(self, limit: int = 20) -> list:
+        rows = self._execute('SELECT * FROM scan_runs ORDER BY started_at DESC LIMIT ?', (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def completed_runs(self) -> list:
+        rows = self._execute("SELECT * FROM scan_runs WHERE status = 'completed' ORDER BY started_at").fetchall()
+        return [dict(r) for r in rows]
+
+    def checkpoint(self, run_id: str, page_token, listing_done: bool, processed_ids: list,
+                   stage_offsets: dict, emails_scanned: int, resumes_found: int):
+        """Atomically record scan progress"""
+        statements = [(
+            'INSERT OR IGNORE INTO processed_messages (run_id, message_id) VALUES (?, ?)', (run_id, message_id)
+        ) for message_id in processed_ids]
+        statements.append((
+            'UPDATE scan_runs SET page_token = ?, listing_done = ?, stage_offsets = ?, emails_scanned = ?, '
+            'resumes_found = ?, updated_at = ? WHERE run_id = ?',
+            (page_token, int(listing_done), json.dumps(stage_offsets), emails_scanned, resumes_found,
+             datetime.now().isoformat(), run_id)
+        ))
+        self._transaction(statements)
+
+    def processed_ids(self, run_id: str) -> set:
+        rows = self._execute('SELECT message_id FROM processed_messages WHERE run_id = ?', (run_id,)).fetchall()
+        return {r[0] for r in rows}
+
+    def finish_run(self, run_id: str, status: str, emails_scanned: int, resumes_found: int,
+                   history_cursors: dict = None):
+        """Record how a run ended
+
+        Only a completed run moves history cursors: a full scan replaces every
+        label's cursor with the baseline it started from, and `history_cursors`
+        ({label_id: history_id}) are saved on top, in the same transaction.
+        """
+        now = datetime.now().isoformat()
+        statements = [
+            ('UPDATE scan_runs SET status = ?, emails_scanned = ?, resumes_found = ?, finished_at = ?, '
+             'updated_at = ? WHERE run_id = ?', (status, emails_scanned, resumes_found, now, now, run_id))
+        ]
+        if status == 'completed':
+            # Per-message bookkeeping is only needed while a run can still be resumed
+            statements.append(('DELETE FROM processed_messages WHERE run_id = ?', (run_id,)))
+            baseline = self.run_history_baseline(run_id)
+            if baseline is not None:
+                statements += [
+                    ('DELETE FROM store_meta WHERE key = ?', (f"history_baseline:{run_id}",)),
+                    ('DELETE FROM history_cursors', ()),
+                    ('INSERT INTO history_cursors (label_id, history_id, updated_at) VALUES (?, ?, ?)',
+                     ('', baseline, now))
+                ]
+            statements += [
+                ('INSERT OR REPLACE INTO history_cursors (label_id, history_id, updated_at) VALUES (?, ?, ?)',
+                 (label_id, history_id, now))
+                for label_id, history_id in (history_cursors or {}).items()
+            ]
+        self._transaction(statements)
+
+    # ------------------------------------------------------------ attachments and candidates
+
+    def find_attachment(self, content_hash: str):
+        row = self._execute('SELECT * FROM attachments WHERE content_hash = ?', (content_hash,)).fetchone()
+        return dict(row) if row else None
+
+    def _attachment_statement(self, run_id: str, attachment: dict, is_resume: bool):
+        return (
+            'INSERT OR IGNORE INTO attachments (content_hash, run_id, message_id, filename, mime_type, size, '
+            'is_resume, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (attachment['content_hash'], run_id, attachment['message_id'], attachment['filename'],
+             attachment.get('mime_type'), attachment.get('size', 0), int(is_resume), datetime.now().isoformat())
+        )
+
+    def record_attachment(self, run_id: str, attachment: dict, is_resume: bool = False):
+        self._execute(*self._attachment_statement(run_id, attachment, is_resume))
+
+    def save_candidate(self, run_id: str, candidate: dict, attachment: dict) -> int:
+        """Insert a candidate and its attachment in one transaction, returning the candidate id"""
+        row = dict(candidate, run_id=run_id, skills=json.dumps(candidate['skills']),
+                   fresher=int(candidate['fresher']),
+                   created_at=candidate.get('created_at') or datetime.now().isoformat())
+        with self._lock:
+            self._transaction([
+                self._attachment_statement(run_id, attachment, True),
+                (f"INSERT OR IGNORE INTO candidates ({', '.join(CANDIDATE_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' for _ in CANDIDATE_COLUMNS)})",
+                 tuple(row.get(c) for c in CANDIDATE_COLUMNS))
+            ])
+            found = self._conn.execute('SELECT id FROM candidates WHERE content_hash = ?',
+                                       (candidate['content_hash'],)).fetchone()
+        return found[0]
+
+    @staticmethod
+    def _candidate_from_row(row) -> dict:
+        candidate = dict(row)
+        if 'skills' in candidate:
+            candidate['skills'] = json.loads(candidate['skills'] or '{}')
+        if 'fresher' in candidate:
+            candidate['fresher'] = bool(candidate['fresher'])
+        return candidate
+
+    def unexported_candidates(self, limit: int = 1000) -> list:
+        rows = self._execute('SELECT * FROM candidates WHERE exported = 0 ORDER BY id LIMIT ?', (limit,)).fetchall()
+        return [self._candidate_from_row(r) for r in rows]
+
+    def mark_exported(self, candidate_ids: list):
+        self._transaction([('UPDATE candidates SET exported = 1 WHERE id = ?', (cid,)) for cid in candidate_ids])
+
+    def list_candidates(self, after_id: int = 0, limit: int = 50) -> list:
+        """One keyset page: candidates with id > after_id, ascending"""
+        rows = self._execute('SELECT * FROM candidates WHERE id > ? ORDER BY id LIMIT ?',
+                             (after_id, limit)).fetchall()
+        return [self._candidate_from_row(r) for r in rows]
+
+    def iter_candidates(self, columns: tuple = ('*',), batch_size: int = 5000, after_id: int = 0):
+        """Stream candidate rows with id > after_id in id order without loading the table at once"""
+        last_id = after_id
+        while True:
+            rows = self._execute(
+                f"SELECT {', '.join(columns)} FROM candidates WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._candidate_from_row(row)
+            last_id = rows[-1]['id']
+
+    def iter_run_rows(self, table: str, run_id: str, batch_size: int = 5000):
+        """Stream the candidates or attachments rows written by one run, in insertion order"""
+        if table not in ('candidates', 'attachments'):
+            raise ValueError(f"Unknown table: {table}")
+        last_rowid = 0
+        while True:
+            rows = self._execute(
+                f"SELECT rowid AS _rowid, * FROM {table} WHERE run_id = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (run_id, last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                record = dict(row)
+                del record['_rowid']
+                yield record
+            last_rowid = rows[-1]['_rowid']
+
+    def max_candidate_id(self) -> int:
+        return self._execute('SELECT COALESCE(MAX(id), 0) FROM candidates').fetchone()[0]
+
+    # ------------------------------------------------------------ history cursors
+
+    def history_cursors(self) -> dict:
+        """{label_id: history_id} processed so far; '' holds the baseline of the last full scan"""
+        rows = self._execute('SELECT label_id, history_id FROM history_cursors').fetchall()
+        return {r['label_id']: r['history_id'] for r in rows}
+
+    def save_history_cursor(self, label_id: str, history_id: int):
+        self._execute('INSERT OR REPLACE INTO history_cursors (label_id, history_id, updated_at) VALUES (?, ?, ?)',
+                      (label_id, history_id, datetime.now().isoformat()))
+
+    # ------------------------------------------------------------ sheet rows
+
+    def spreadsheet_id(self):
+        """Results spreadsheet the sheet rows were written to, or None"""
+        row = self._execute("SELECT value FROM store_meta WHERE key = 'spreadsheet_id'").fetchone()
+        return row[0] if row else None
+
+    def save_spreadsheet_id(self, spreadsheet_id: str):
+        """Remember the results spreadsheet; switching to another one forgets the rows written to the old one"""
+        with self._lock:
+            if spreadsheet_id == self.spreadsheet_id():
+                return
+            self._transaction([
+                ('INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)', ('spreadsheet_id', spreadsheet_id)),
+                ('DELETE FROM sheet_rows WHERE spreadsheet_id != ?', (spreadsheet_id,))
+            ])
+
+    def sheet_rows(self, spreadsheet_id: str, candidate_ids: list) -> dict:
+        """{candidate_id: (row_number, row_hash)} for candidates already written to the sheet"""
+        found = {}
+        for start in range(0, len(candidate_ids), 500):
+            chunk = candidate_ids[start:start + 500]
+            rows = self._execute(
+                f"SELECT candidate_id, row_number, row_hash FROM sheet_rows WHERE spreadsheet_id = ? "
+                f"AND candidate_id IN ({', '.join('?' for _ in chunk)})", (spreadsheet_id, *chunk)).fetchall()
+            found.update((r['candidate_id'], (r['row_number'], r['row_hash'])) for r in rows)
+        return found
+
+    def last_sheet_row(self, spreadsheet_id: str):
+        """Highest row number written for the sheet, or None if nothing is recorded"""
+        return self._execute('SELECT MAX(row_number) FROM sheet_rows WHERE spreadsheet_id = ?',
+                             (spreadsheet_id,)).fetchone()[0]
+
+    def save_sheet_rows(self, spreadsheet_id: str, entries: dict):
+        """Record {candidate_id: (row_number, row_hash)} after a successful write"""
+        self._transaction([
+            ('INSERT OR REPLACE INTO sheet_rows (spreadsheet_id, candidate_id, row_number, row_hash) '
+             'VALUES (?, ?, ?, ?)', (spreadsheet_id, cid, row_number, row_hash))
+            for cid, (row_number, row_hash) in entries.items()
+        ])
+
+
+class ScanCheckpoint:
+    """Tracks which listed messages are finished and periodically saves progress
+
+    A message is finished once every attachment it fanned out into has been
+    persisted or dropped. The resume point is the page token of the oldest
+    Gmail result page that still has unfinished messages, so a resumed scan
+    re-lists at most one page per unfinished message and skips the rest.
+    """
+
+    def __init__(self, store: ScanStore, run_id: str, processed: set = None,
+                 interval_seconds: float = 2.0, batch_size: int = 25, stage_offsets=None,
+                 resumes_found: int = 0):
+        self.store = store
+        self.run_id = run_id
+        self.processed = set(processed or ())
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.stage_offsets = stage_offsets or (lambda: {})
+        self.previous_offsets = {}
+        self.resumes_found = resumes_found
+        self._pending = {}
+        self._pages = {}
+        self._next_token = None
+        self._listing_done = False
+        self._unsaved = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def page_listed(self, page_no: int, token):
+        with self._lock:
+            self._pages[page_no] = {'token': token, 'outstanding': 0, 'complete': False}
+
+    def page_complete(self, page_no: int, next_token):
+        with self._lock:
+            self._pages[page_no]['complete'] = True
+            self._next_token = next_token
+            self._listing_done = next_token is None
+
+    def message_listed(self, message_id: str, page_no: int):
+        with self._lock:
+            self._pending[message_id] = [1, page_no]
+            if page_no in self._pages:
+                self._pages[page_no]['outstanding'] += 1
+
+    def message_expanded(self, message_id: str, parts: int):
+        """A message fanned out into `parts` work items (0 finishes it)"""
+        if parts == 0:
+            self.message_done(message_id)
+            return
+        with self._lock:
+            if message_id in self._pending:
+                self._pending[message_id][0] = parts
+
+    def item_added(self, message_id: str):
+        """A work item fanned out one more (e.g. a document unpacked from an archive)"""
+        with self._lock:
+            if message_id in self._pending:
+                self._pending[message_id][0] += 1
+
+    def message_done(self, message_id: str, resume: bool = False):
+        """One work item of a message reached a terminal stage"""
+        with self._lock:
+            if resume:
+                self.resumes_found += 1
+            entry = self._pending.get(message_id)
+            if entry is None:
+                return
+            entry[0] -= 1
+            if entry[0] > 0:
+                return
+            del self._pending[message_id]
+            page = self._pages.get(entry[1])
+            if page:
+                page['outstanding'] -= 1
+            self.processed.add(message_id)
+            self._unsaved.append(message_id)
+            due = (len(self._unsaved) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.interval_seconds)
+        if due:
+            self.flush()
+
+    def resume_token(self):
+        """Page token to restart listing from (None means the first page)"""
+        unfinished = [n for n, p in self._pages.items() if not p['complete'] or p['outstanding'] > 0]
+        if unfinished:
+            return self._pages[min(unfinished)]['token']
+        return self._next_token
+
+    def flush(self):
+        with self._lock:
+            ids, self._unsaved = self._unsaved, []
+            token = self.resume_token()
+            listing_done = self._listing_done and not self._pending
+            emails_scanned = len(self.processed)
+            resumes_found = self.resumes_found
+            self._last_flush = time.monotonic()
+            # Hold the lock while writing so checkpoints land in order
+            self.store.checkpoint(self.run_id, token, listing_done, ids, self.stage_offsets(),
+                                  emails_scanned, resumes_found)
@@ -0,0 +1,95 @@
+"""Delta sync of candidate rows to the results spreadsheet
+
+The scan database remembers, per spreadsheet, which row each candidate
+was written to and a hash of the values written there. A sync hashes the
+rows it is given and drops the unchanged ones. New candidates go after
+the last known row and changed ones are rewritten in place. Everything
+goes out as one values.batchUpdate whose ranges cover only the touched
+rows, with consecutive rows sharing a range.
+
+Export cost therefore follows the number of new or changed candidates,
+not the size of the sheet. Re-exporting candidates that already reached
+the sheet (e.g. leftovers of an interrupted run) writes nothing instead
+of appending duplicates.
+"""
+import json
+import hashlib
+import threading
+
+HEADER_ROWS = 1
+
+
+def row_hash(values: list) -> str:
+    return hashlib.sha1(json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+
+def column_letter(number: int) -> str:
+    """A1 column name of a 1-based column number"""
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def merge_ranges(updates: dict) -> list:
+    """ValueRanges covering {row_number: values} with one range per run of consecutive rows"""
+    data = []
+    for row_number in sorted(updates):
+        values = updates[row_number]
+        if data and data[-1]['_end'] == row_number - 1:
+            data[-1]['values'].append(values)
+            data[-1]['_end'] = row_number
+        else:
+            data.append({'_start': row_number, '_end': row_number, 'values': [values]})
+    width = max((len(v) for v in updates.values()), default=1)
+    return [{'range': f"A{d['_start']}:{column_letter(width)}{d['_end']}", 'values': d['values']} for d in data]
+
+
+class SheetSync:
+    """Writes only inserted or changed candidate rows, remembering row positions in the scan store"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+
+    def sync(self, service, spreadsheet_id: str, rows: dict) -> dict:
+        """Bring {candidate_id: values} up to date in the sheet; returns per-outcome row counts"""
+        with self._lock:
+            known = self.store.sheet_rows(spreadsheet_id, list(rows))
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'ranges': 0}
+            updates = {}
+            entries = {}
+            next_row = None
+            for candidate_id, values in rows.items():
+                digest = row_hash(values)
+                row_number, written = known.get(candidate_id, (None, None))
+                if written == digest:
+                    counts['unchanged'] += 1
+                    continue
+                if row_number is None:
+                    if next_row is None:
+                        next_row = self._next_row(service, spreadsheet_id)
+                    row_number, next_row = next_row, next_row + 1
+                    counts['inserted'] += 1
+                else:
+                    counts['updated'] += 1
+                updates[row_number] = values
+                entries[candidate_id] = (row_number, digest)
+
+            if updates:
+                data = merge_ranges(updates)
+                service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=spreadsheet_id, body={'valueInputOption': 'RAW', 'data': data}
+                ).execute()
+                self.store.save_sheet_rows(spreadsheet_id, entries)
+                counts['ranges'] = len(data)
+            return counts
+
+    def _next_row(self, service, spreadsheet_id: str) -> int:
+        last = self.store.last_sheet_row(spreadsheet_id)
+        if last is None:
+            # A sheet this database has never written to: continue after whatever is already on it
+            result = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range='A:A').execute()
+            last = max(len(result.get('values', [])), HEADER_ROWS)
+        return last + 1
@@ -0,0 +1,331 @@
+"""Bitmap index over candidate ids for boolean skill filtering
+
+Every skill (and skill category, and the `fresher` flag) gets an integer
+term id and one bitmap with bit N set when candidate N has it. Bitmaps are
+kept as mutable bytearrays for O(1) inserts and materialised lazily into
+Python ints, whose `&`, `|` and `~` run in C over machine words. A filter
+like "UVM AND SystemVerilog AND NOT fresher AND (Cadence OR Synopsys)"
+therefore costs a handful of word-parallel operations regardless of how
+many candidates match.
+
+Numeric predicates (received date, years of experience) use bit-sliced
+indexes: one bitmap per bit of the value, so a range query is ~2 x bits
+bitmap operations instead of a scan over every candidate. Each of those
+still touches every id, so at 1M candidates a date plus experience range
+costs milliseconds where a term-only query costs tens to hundreds of
+microseconds.
+
+Bitmaps can also sit directly on a memory-mapped snapshot (see
+index_snapshot.py); they are copied into memory only when first modified.
+"""
+import re
+import threading
+from array import array
+from datetime import date
+
+from index_snapshot import SnapshotFormatError
+
+EPOCH = date(2000, 1, 1)
+DATE_BITS = 16
+EXPERIENCE_BITS = 10
+EXPERIENCE_SCALE = 10  # experience is indexed in tenths of a year
+
+
+class FilterQueryError(ValueError):
+    """Raised for malformed boolean filter expressions"""
+
+
+class Bitmap:
+    """Growable bitset with a cached integer view"""
+
+    __slots__ = ('bits', '_value')
+
+    def __init__(self):
+        self.bits = bytearray()
+        self._value = 0
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'Bitmap':
+        """Read-only bitmap over `buffer`, copied on first write"""
+        bitmap = cls()
+        bitmap.bits = buffer
+        bitmap._value = None
+        return bitmap
+
+    def _writable(self):
+        if not isinstance(self.bits, bytearray):
+            self.bits = bytearray(self.bits)
+
+    def add(self, position: int):
+        self._writable()
+        byte = position >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1 + len(self.bits) // 2))
+        self.bits[byte] |= 1 << (position & 7)
+        self._value = None
+
+    def __contains__(self, position: int) -> bool:
+        byte = position >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (position & 7) & 1)
+
+    @property
+    def value(self) -> int:
+        if self._value is None:
+            self._value = int.from_bytes(self.bits, 'little')
+        return self._value
+
+
+class BitSlicedIndex:
+    """Non-negative integer attribute stored as one bitmap per bit"""
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.slices = [Bitmap() for _ in range(bits)]
+        self.exists = Bitmap()
+
+    def add(self, position: int, value: int):
+        value = max(0, min(int(value), (1 << self.bits) - 1))
+        self.exists.add(position)
+        for i in range(self.bits):
+            if value >> i & 1:
+                self.slices[i].add(position)
+
+    def bitmaps(self) -> list:
+        return [self.exists] + self.slices
+
+    @classmethod
+    def from_bitmaps(cls, bitmaps: list) -> 'BitSlicedIndex':
+        index = cls(len(bitmaps) - 1)
+        index.exists, index.slices = bitmaps[0], bitmaps[1:]
+        return index
+
+    def less_equal(self, bound: int) -> int:
+        """Bitmap of positions whose value is <= bound"""
+        exists = self.exists.value
+        if bound < 0:
+            return 0
+        if bound >= (1 << self.bits) - 1:
+            return exists
+        less, equal = 0, exists
+        for i in range(self.bits - 1, -1, -1):
+            slice_value = self.slices[i].value
+            if bound >> i & 1:
+                less |= equal & ~slice_value
+                equal &= slice_value
+            else:
+                equal &= ~slice_value
+        return less | equal
+
+    def between(self, low: int = None, high: int = None) -> int:
+        result = self.exists.value
+        if high is not None:
+            result &= self.less_equal(high)
+        if low is not None:
+            result &= ~self.less_equal(low - 1)
+        return result
+
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+
+
+def _tokenize(query: str) -> list:
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if not match:
+            raise FilterQueryError(f"Unexpected character at {position}: {query[position:position + 10]!r}")
+        position = match.end()
+        opening, closing, quoted, word = match.groups()
+        if opening:
+            tokens.append(('(', None))
+        elif closing:
+            tokens.append((')', None))
+        elif quoted is not None:
+            tokens.append(('TERM', quoted))
+        elif word.upper() in ('AND', 'OR', 'NOT'):
+            tokens.append((word.upper(), None))
+        else:
+            tokens.append(('TERM', word))
+    return tokens
+
+
+class SkillIndex:
+    """Term bitmaps plus date and experience range indexes over candidate ids"""
+
+    def __init__(self):
+        self.term_ids = {}
+        self.terms = []
+        self.bitmaps = []
+        self.universe = Bitmap()
+        self.received = BitSlicedIndex(DATE_BITS)
+        self.experience = BitSlicedIndex(EXPERIENCE_BITS)
+        self.count = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def normalize(term: str) -> str:
+        return ' '.join(term.lower().replace('_', ' ').split())
+
+    def term_id(self, term: str, create: bool = False):
+        key = self.normalize(term)
+        term_id = self.term_ids.get(key)
+        if term_id is None and create:
+            term_id = len(self.terms)
+            self.term_ids[key] = term_id
+            self.terms.append(term)
+            self.bitmaps.append(Bitmap())
+        return term_id
+
+    def add(self, candidate_id: int, skills: dict, experience_years: float = 0.0,
+            received_on: date = None, fresher: bool = False):
+        """Index one candidate; `skills` is the {category: [skill, ...]} dict from matching"""
+        with self._lock:
+            terms = set()
+            for category, names in skills.items():
+                terms.add(category)
+                terms.update(names)
+            if fresher:
+                terms.add('fresher')
+            for term in terms:
+                self.bitmaps[self.term_id(term, create=True)].add(candidate_id)
+
+            self.experience.add(candidate_id, round((experience_years or 0) * EXPERIENCE_SCALE))
+            if received_on is not None:
+                self.received.add(candidate_id, (received_on - EPOCH).days)
+            # Rescans and snapshot catch-up can index an id again; only new ids are counted
+            if candidate_id not in self.universe:
+                self.universe.add(candidate_id)
+                self.count += 1
+
+    def term_bitmap(self, term: str) -> int:
+        term_id = self.term_id(term)
+        return 0 if term_id is None else self.bitmaps[term_id].value
+
+    def parse(self, query: str):
+        """Compile a boolean expression into a zero-argument evaluator"""
+        tokens = _tokenize(query)
+        position = 0
+        unknown = []
+
+        def peek():
+            return tokens[position][0] if position < len(tokens) else None
+
+        def take(kind):
+            nonlocal position
+            if peek() != kind:
+                raise FilterQueryError(f"Expected {kind} at token {position + 1}")
+            token = tokens[position]
+            position += 1
+            return token
+
+        def parse_or():
+            node = parse_and()
+            while peek() == 'OR':
+                take('OR')
+                left, right = node, parse_and()
+                node = lambda left=left, right=right: left() | right()
+            return node
+
+        def parse_and():
+            node = parse_not()
+            while peek() in ('AND', 'NOT', 'TERM', '('):
+                if peek() == 'AND':
+                    take('AND')
+                left, right = node, parse_not()
+                node = lambda left=left, right=right: left() & right()
+            return node
+
+        def parse_not():
+            if peek() == 'NOT':
+                take('NOT')
+                operand = parse_not()
+                return lambda: self.universe.value & ~operand()
+            return parse_atom()
+
+        def parse_atom():
+            if peek() == '(':
+                take('(')
+                node = parse_or()
+                take(')')
+                return node
+            _, term = take('TERM')
+            if self.term_id(term) is None:
+                unknown.append(term)
+            return lambda: self.term_bitmap(term)
+
+        if not tokens:
+            return (lambda: self.universe.value), unknown
+        node = parse_or()
+        if position != len(tokens):
+            raise FilterQueryError(f"Unexpected {tokens[position][0]} at token {position + 1}")
+        return node, unknown
+
+    def filter(self, query: str = '', received_from: date = None, received_to: date = None,
+               min_experience: float = None, max_experience: float = None) -> dict:
+        """Evaluate a boolean skill expression combined with range predicates"""
+        evaluate, unknown = self.parse(query or '')
+        with self._lock:
+            result = evaluate() & self.universe.value
+            if received_from is not None or received_to is not None:
+                result &= self.received.between(
+                    None if received_from is None else (received_from - EPOCH).days,
+                    None if received_to is None else (received_to - EPOCH).days
+                )
+            if min_experience is not None or max_experience is not None:
+                result &= self.experience.between(
+                    None if min_experience is None else int(round(min_experience * EXPERIENCE_SCALE)),
+                    None if max_experience is None else int(round(max_experience * EXPERIENCE_SCALE))
+                )
+        return {'bitmap': result, 'count': result.bit_count(), 'unknown_terms': unknown}
+
+    def snapshot_sections(self) -> tuple:
+        """Serialise every bitmap into one blob plus an offsets table, for index_snapshot"""
+        with self._lock:
+            bitmaps = [self.universe] + self.received.bitmaps() + self.experience.bitmaps() + self.bitmaps
+            blob, offsets = bytearray(), array('Q', [0])
+            for bitmap in bitmaps:
+                blob += bytes(bitmap.bits).rstrip(b'\x00')
+                offsets.append(len(blob))
+            meta = {'terms': list(self.terms), 'count': self.count,
+                    'date_bits': DATE_BITS, 'experience_bits': EXPERIENCE_BITS}
+        return {'skills.offsets': offsets, 'skills.bitmaps': blob}, {'skills': meta}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'SkillIndex':
+        """Index whose bitmaps are views into a mapped IndexSnapshot"""
+        meta = snapshot.meta['skills']
+        if (meta['date_bits'], meta['experience_bits']) != (DATE_BITS, EXPERIENCE_BITS):
+            raise SnapshotFormatError('Skill index snapshot uses different range index widths')
+        offsets = snapshot.section('skills.offsets', 'Q')
+        blob = snapshot.section('skills.bitmaps')
+        bitmaps = [Bitmap.from_buffer(blob[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+        if len(bitmaps) != 3 + DATE_BITS + EXPERIENCE_BITS + len(meta['terms']):
+            raise SnapshotFormatError('Skill index snapshot has an unexpected number of bitmaps')
+
+        index = cls()
+        index.universe = bitmaps[0]
+        index.received = BitSlicedIndex.from_bitmaps(bitmaps[1:2 + DATE_BITS])
+        index.experience = BitSlicedIndex.from_bitmaps(bitmaps[2 + DATE_BITS:3 + DATE_BITS + EXPERIENCE_BITS])
+        index.bitmaps = bitmaps[3 + DATE_BITS + EXPERIENCE_BITS:]
+        index.terms = list(meta['terms'])
+        index.term_ids = {cls.normalize(term): i for i, term in enumerate(index.terms)}
+        index.count = meta['count']
+        return index
+
+    @staticmethod
+    def ids(bitmap: int, offset: int = 0, limit: int = None) -> list:
+        """Candidate ids set in `bitmap`, ascending"""
+        found = []
+        bits = bin(bitmap)[:1:-1]
+        position = bits.find('1')
+        skipped = 0
+        while position != -1:
+            if skipped >= offset:
+                found.append(position)
+                if limit is not None and len(found) >= limit:
+                    break
+            else:
+                skipped += 1
+            position = bits.find('1', position + 1)
+        return found
@@ -0,0 +1,310 @@
+"""Columnar snapshots of scan results for offline analytics
+
+Completed scan runs are written once, in batches, as one file per table
+and scan date into a hive-partitioned tree; a batch file is named after
+the first run in it:
+
+    <root>/candidates/scan_date=2024-05-01/<run_id>.arrow
+    <root>/candidate_skills/scan_date=2024-05-01/<run_id>.arrow
+    <root>/attachments/scan_date=2024-05-01/<run_id>.arrow
+    <root>/scan_runs/scan_date=2024-05-01/<run_id>.arrow
+    <root>/_manifest.json
+
+Push and scheduled scans complete many tiny runs, so the app only exports
+once `batch_runs` runs are pending or the oldest has waited `max_age`
+seconds; the command line exports everything pending at once.
+
+New batches only ever add files, so readers never see a partially
+rewritten snapshot. Arrow IPC files (the default) are uncompressed and
+can be memory-mapped and read zero-copy; Parquet is available for smaller
+files at the cost of a decode on read. The manifest records which runs
+have been exported so the job is safe to re-run.
+
+pyarrow is an optional dependency; the app only exports when
+SNAPSHOT_EXPORT=1 is set.
+
+Usage:
+    python -m snapshot_export --db data/scanner.db --out data/snapshots [--format parquet]
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+TABLES = ('scan_runs', 'candidates', 'candidate_skills', 'attachments')
+BATCH_ROWS = 10000
+
+logger = logging.getLogger(__name__)
+
+
+def _schemas() -> dict:
+    timestamp = pa.timestamp('us')
+    return {
+        'scan_runs': pa.schema([
+            ('run_id', pa.string()), ('kind', pa.string()), ('query', pa.string()), ('status', pa.string()),
+            ('started_at', timestamp), ('finished_at', timestamp), ('emails_scanned', pa.int64()),
+            ('resumes_found', pa.int64()), ('resumed_count', pa.int32())
+        ]),
+        'candidates': pa.schema([
+            ('id', pa.int64()), ('run_id', pa.string()), ('message_id', pa.string()),
+            ('content_hash', pa.string()), ('name', pa.string()), ('email', pa.string()),
+            ('phone', pa.string()), ('experience_years', pa.float32()), ('fresher', pa.bool_()),
+            ('skill_count', pa.int16()), ('sender', pa.string()), ('subject', pa.string()),
+            ('received_at', pa.timestamp('s', tz='UTC')), ('filename', pa.string()),
+            ('drive_file_id', pa.string()), ('created_at', timestamp)
+        ]),
+        'candidate_skills': pa.schema([
+            ('candidate_id', pa.int64()), ('category', pa.string()), ('skill', pa.string())
+        ]),
+        'attachments': pa.schema([
+            ('content_hash', pa.string()), ('run_id', pa.string()), ('message_id', pa.string()),
+            ('filename', pa.string()), ('mime_type', pa.string()), ('size', pa.int64()),
+            ('is_resume', pa.bool_()), ('seen_at', timestamp)
+        ])
+    }
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _received_at(value):
+    try:
+        received = parsedate_to_datetime(value or '')
+    except (TypeError, ValueError, IndexError):
+        return None
+    return received if received.tzinfo else received.replace(tzinfo=timezone.utc)
+
+
+class _TableWriter:
+    """Batched writer for one table file, written to a temp path and renamed on close"""
+
+    def __init__(self, path: str, schema, fmt: str):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.rows = 0
+        self._pending = []
+        self._writer = None
+        self._tmp = path + '.tmp'
+
+    def write(self, record: dict):
+        self._pending.append(record)
+        if len(self._pending) >= BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.fmt == 'parquet':
+                self._writer = pq.ParquetWriter(self._tmp, self.schema, compression='zstd')
+            else:
+                self._writer = pa.ipc.new_file(self._tmp, self.schema)
+        self._writer.write_batch(pa.RecordBatch.from_pylist(self._pending, schema=self.schema))
+        self.rows += len(self._pending)
+        self._pending.clear()
+
+    def close(self) -> int:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._tmp, self.path)
+        return self.rows
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self._tmp)
+
+
+class SnapshotExporter:
+    """Append-only columnar export of completed scan runs"""
+
+    def __init__(self, store, root: str, fmt: str = 'arrow', batch_runs: int = 1, max_age: float = 0):
+        if fmt not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {fmt}")
+        self.store = store
+        self.root = root
+        self.fmt = fmt
+        self.batch_runs = max(1, batch_runs)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._trigger_lock = threading.Lock()
+        self._requested = False
+        self._thread = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, '_manifest.json')
+
+    def manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': SNAPSHOT_VERSION, 'format': self.fmt, 'runs': {}, 'batches': {}}
+
+    def _save_manifest(self, manifest: dict):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def export_pending(self, force: bool = True) -> list:
+        """Export completed runs not yet in the manifest as one batch; returns the exported run ids
+
+        Unless `force`, nothing is written until the batch is due.
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError('pyarrow is not installed')
+        with self._lock:
+            manifest = self.manifest()
+            if manifest.get('format', self.fmt) != self.fmt:
+                raise ValueError(f"Snapshot at {self.root} is {manifest['format']}, not {self.fmt}")
+            pending = [run for run in self.store.completed_runs() if run['run_id'] not in manifest['runs']]
+            if not pending or not (force or self._batch_due(pending)):
+                return []
+            batch_id = pending[0]['run_id']
+            manifest.setdefault('batches', {})[batch_id] = self._export_batch(batch_id, pending)
+            manifest['runs'].update((run['run_id'], batch_id) for run in pending)
+            manifest['version'] = SNAPSHOT_VERSION
+            self._save_manifest(manifest)
+            return [run['run_id'] for run in pending]
+
+    def _batch_due(self, pending: list) -> bool:
+        if len(pending) >= self.batch_runs:
+            return True
+        oldest = _timestamp(pending[0]['finished_at'] or pending[0]['started_at'])
+        return oldest is not None and (datetime.now() - oldest).total_seconds() >= self.max_age
+
+    def export_in_background(self) -> bool:
+        """Export pending runs on a daemon thread; triggers that arrive mid-export queue one more pass"""
+        with self._trigger_lock:
+            self._requested = True
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._export_loop, name='snapshot-export', daemon=True)
+            self._thread.start()
+            return True
+
+    def _export_loop(self):
+        while True:
+            with self._trigger_lock:
+                if not self._requested:
+                    self._thread = None
+                    return
+                self._requested = False
+            try:
+                exported = self.export_pending(force=False)
+                if exported:
+                    logger.info(f"📦 Snapshot exported {len(exported)} run(s) to {self.root}")
+            except Exception as e:
+                logger.error(f"❌ Snapshot export failed: {e}")
+
+    def _export_batch(self, batch_id: str, runs: list) -> dict:
+        schemas = _schemas()
+        writers = {}
+        try:
+            for run in runs:
+                scan_date = (run['started_at'] or datetime.now().isoformat())[:10]
+                for table in TABLES:
+                    if (table, scan_date) not in writers:
+                        path = os.path.join(self.root, table, f"scan_date={scan_date}",
+                                            batch_id + SNAPSHOT_FORMATS[self.fmt])
+                        writers[table, scan_date] = _TableWriter(path, schemas[table], self.fmt)
+                self._write_run(run, {table: writers[table, scan_date] for table in TABLES})
+        except Exception:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        rows = dict.fromkeys(TABLES, 0)
+        for (table, _), writer in writers.items():
+            rows[table] += writer.close()
+        return {'scan_dates': sorted({scan_date for _, scan_date in writers}), 'runs': len(runs), 'rows': rows,
+                'exported_at': datetime.now().isoformat()}
+
+    def _write_run(self, run: dict, writers: dict):
+        writers['scan_runs'].write({
+            'run_id': run['run_id'], 'kind': run['kind'], 'query': run['query'], 'status': run['status'],
+            'started_at': _timestamp(run['started_at']), 'finished_at': _timestamp(run['finished_at']),
+            'emails_scanned': run['emails_scanned'], 'resumes_found': run['resumes_found'],
+            'resumed_count': run['resumed_count']
+        })
+        for candidate in self.store.iter_run_rows('candidates', run['run_id']):
+            skills = json.loads(candidate['skills'] or '{}')
+            writers['candidates'].write(dict(
+                candidate,
+                fresher=bool(candidate['fresher']),
+                received_at=_received_at(candidate['received']),
+                created_at=_timestamp(candidate['created_at'])
+            ))
+            for category, names in skills.items():
+                for name in names:
+                    writers['candidate_skills'].write(
+                        {'candidate_id': candidate['id'], 'category': category, 'skill': name})
+        for attachment in self.store.iter_run_rows('attachments', run['run_id']):
+            writers['attachments'].write(dict(
+                attachment, is_resume=bool(attachment['is_resume']), seen_at=_timestamp(attachment['seen_at'])))
+
+
+def load_table(root: str, table: str):
+    """Read one snapshot table across all partitions, adding a scan_date column
+
+    Arrow IPC files are memory-mapped, so the column data is not copied.
+    """
+    with open(os.path.join(root, '_manifest.json')) as f:
+        fmt = json.load(f).get('format', 'arrow')
+    if fmt == 'parquet':
+        return pq.read_table(os.path.join(root, table), partitioning='hive')
+
+    parts = []
+    table_dir = os.path.join(root, table)
+    for partition in sorted(os.listdir(table_dir)) if os.path.isdir(table_dir) else []:
+        for name in sorted(os.listdir(os.path.join(table_dir, partition))):
+            if not name.endswith(SNAPSHOT_FORMATS['arrow']):
+                continue
+            part = pa.ipc.open_file(pa.memory_map(os.path.join(table_dir, partition, name))).read_all()
+            scan_date = partition.split('=', 1)[1]
+            parts.append(part.append_column('scan_date', pa.array([scan_date] * part.num_rows, pa.string())))
+    if not parts:
+        return _schemas()[table].empty_table()
+    return pa.concat_tables(parts)
+
+
+def main(argv=None) -> int:
+    from scan_store import ScanStore
+
+    parser = argparse.ArgumentParser(description='Export completed scan runs as columnar snapshots')
+    parser.add_argument('--db', required=True, help='path to scanner.db')
+    parser.add_argument('--out', required=True, help='snapshot root directory')
+    parser.add_argument('--format', choices=sorted(SNAPSHOT_FORMATS), default='arrow')
+    args = parser.parse_args(argv)
+
+    if not PYARROW_AVAILABLE:
+        print('pyarrow is not installed: pip install pyarrow', file=sys.stderr)
+        return 1
+    exporter = SnapshotExporter(ScanStore(args.db), args.out, args.format)
+    exported = exporter.export_pending()
+    print(json.dumps({'exported_runs': exported, 'manifest': exporter.manifest_path}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())